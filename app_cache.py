@@ -0,0 +1,109 @@
+# app_cache.py
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from typing import Dict, List, Tuple
+
+from data_processor import DataProcessor
+from nutrition_analyzer import NutritionAnalyzer
+from food_recommender import FoodRecommender
+from dashboard_charts import DashboardCharts
+
+# Cached loaders and lookups shared by both apps. Streamlit keys these caches
+# by function, so the apps also share the cached results with each other.
+
+@st.cache_resource(show_spinner=False)
+def load_food_db() -> Tuple[pd.DataFrame, Dict]:
+    """
+    Load the food database once per process and share it across sessions
+    
+    cache_resource hands every session the same object without hashing or
+    copying it, so the DataFrame must be treated as read-only; the search and
+    food code indexes built on it are shared too.
+    
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Food database and its load status
+    """
+    data_processor = DataProcessor()
+    food_data, status = data_processor.load_food_database()
+    data_processor.build_search_index(food_data)
+    return food_data, status
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_search(query: str) -> List[Dict]:
+    """
+    Search the shared food database, remembering results per query
+    
+    Args:
+        query (str): Normalized (lowercased, stripped) search query
+        
+    Returns:
+        List[Dict]: List of matching food items
+    """
+    food_data, _ = load_food_db()
+    return DataProcessor().search_foods(food_data, query)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_recommendations(nutrients: Tuple[str, ...]) -> Dict[str, List[Dict]]:
+    """
+    Find foods rich in each deficient nutrient, once per set of nutrients
+    
+    Recommendations only depend on which nutrients are deficient, not by how
+    much, so reruns that leave the same gaps reuse the database scans.
+    
+    Args:
+        nutrients (Tuple[str, ...]): Deficient nutrients, in analysis order
+        
+    Returns:
+        Dict[str, List[Dict]]: Recommended foods for each deficient nutrient
+    """
+    food_data, _ = load_food_db()
+    return FoodRecommender().get_recommendations(dict.fromkeys(nutrients), food_data)
+
+@st.cache_data(show_spinner=False)
+def heatmap_fig(nutrients: Tuple[str, ...], title: str) -> go.Figure:
+    """
+    Build the database correlation heatmap once per nutrient selection
+    
+    The food database comes from the cached loader, so the cache key is just
+    the arguments rather than a hash of the whole DataFrame.
+    
+    Args:
+        nutrients (Tuple[str, ...]): Nutrient columns to correlate
+        title (str): Chart title
+        
+    Returns:
+        go.Figure: Plotly heatmap
+    """
+    food_data, _ = load_food_db()
+    return DashboardCharts().create_correlation_heatmap(food_data, list(nutrients), title)
+
+@st.cache_data(show_spinner=False)
+def top_foods_fig(nutrient: str, top_n: int, title: str) -> go.Figure:
+    """
+    Build the database top-foods chart once per nutrient and count
+    
+    Args:
+        nutrient (str): Nutrient to rank foods by
+        top_n (int): Number of top foods to show
+        title (str): Chart title
+        
+    Returns:
+        go.Figure: Plotly horizontal bar chart
+    """
+    food_data, _ = load_food_db()
+    return DashboardCharts().create_top_foods_chart(food_data, nutrient, top_n, title)
+
+@st.cache_resource(show_spinner=False)
+def get_helpers() -> Tuple[DataProcessor, NutritionAnalyzer, FoodRecommender, DashboardCharts]:
+    """
+    Create the stateless helper objects once per process
+    
+    The app classes are instantiated on every rerun, so sharing the helpers
+    keeps their setup out of the rerun path.
+    
+    Returns:
+        Tuple[DataProcessor, NutritionAnalyzer, FoodRecommender, DashboardCharts]:
+        Shared helper instances
+    """
+    return DataProcessor(), NutritionAnalyzer(), FoodRecommender(), DashboardCharts()
@@ -2,14 +2,153 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import re
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import altair as alt
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from functools import lru_cache
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+# Maximum number of points shipped to the browser for scatter charts
+MAX_SCATTER_POINTS = 2000
+
+# Scatter charts with more points than this use WebGL; smaller ones render as
+# SVG so they do not take one of the browser's limited WebGL contexts
+WEBGL_POINT_THRESHOLD = 1000
+
+# Matches the unit suffix of a nutrient column name, e.g. " (mg)"
+_UNIT_RE = re.compile(r' \((?:g|mg|mcg|kcal)\)')
+
+# Serialize figures with orjson, which encodes numpy arrays natively
+pio.json.config.default_engine = 'orjson'
+
+# Shared base layout, layered on top of the default Plotly template
+pio.templates['diet'] = go.layout.Template(layout=dict(
+    title=dict(x=0.5, font=dict(size=16)),
+    height=400,
+    margin=dict(t=50, b=50, l=50, r=50)
+))
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select representative points using Largest-Triangle-Three-Buckets
+    
+    Args:
+        x (np.ndarray): X values
+        y (np.ndarray): Y values
+        n_out (int): Number of points to keep
+        
+    Returns:
+        np.ndarray: Indices of the selected points, ordered by x
+    """
+    n = len(x)
+    order = np.argsort(x, kind='mergesort')
+    if n_out >= n or n_out < 3:
+        return order
+    
+    xs = x[order].astype(float)
+    ys = y[order].astype(float)
+    
+    # First and last points are always kept; the rest are split into buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    anchor = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[end:next_end].mean()
+        avg_y = ys[end:next_end].mean()
+        
+        area = np.abs(
+            (xs[anchor] - avg_x) * (ys[start:end] - ys[anchor])
+            - (xs[anchor] - xs[start:end]) * (avg_y - ys[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    
+    return order[selected]
+
+
+def _correlation_matrix(df: pd.DataFrame, nutrients: Tuple[str, ...]) -> np.ndarray:
+    """
+    Compute the correlation matrix for a set of nutrient columns
+    
+    Args:
+        df (pd.DataFrame): Food database
+        nutrients (Tuple[str, ...]): Nutrient columns to correlate
+        
+    Returns:
+        np.ndarray: Correlation matrix, ordered like ``nutrients``
+    """
+    values = np.ascontiguousarray(df[list(nutrients)].to_numpy(dtype=np.float32))
+    np.nan_to_num(values, copy=False)
+    
+    # Constant columns have no defined correlation and come back as NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.corrcoef(values, rowvar=False)
+
+
+def _top_foods(df: pd.DataFrame, nutrient: str, top_n: int) -> pd.DataFrame:
+    """
+    Get the foods with the highest non-zero content of a nutrient
+    
+    Args:
+        df (pd.DataFrame): Food database
+        nutrient (str): Nutrient column name
+        top_n (int): Number of foods to return
+        
+    Returns:
+        pd.DataFrame: Top foods sorted by nutrient content
+    """
+    values = df[nutrient].to_numpy(dtype=float, na_value=-np.inf)
+    
+    # Partial selection of the top_n rows, then sort only those
+    if top_n < len(values):
+        idx = np.argpartition(-values, top_n - 1)[:top_n]
+    else:
+        idx = np.arange(len(values))
+    idx = idx[np.argsort(-values[idx], kind='stable')]
+    
+    top_foods = df.iloc[idx]
+    return top_foods[top_foods[nutrient] > 0]  # Remove zero values
+
+
+@lru_cache(maxsize=32)
+def _empty_chart(message: str, template: str) -> go.Figure:
+    """
+    Build the placeholder figure shown when a chart has no data
+    
+    Args:
+        message (str): Message to display
+        template (str): Plotly template name
+        
+    Returns:
+        go.Figure: Empty chart with message, shared between calls
+    """
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5,
+        showarrow=False,
+        font=dict(size=16, color="gray")
+    )
+    fig.update_layout(
+        template=template,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False)
+    )
+    return fig
+
+
 class DashboardCharts:
     """Handles all chart visualizations for the nutrition dashboard"""
     
@@ -23,6 +162,7 @@ class DashboardCharts:
             'info': '#17a2b8',
             'nutrients': ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
         }
+        self._template = 'plotly+diet'
     
     def create_macronutrient_pie_chart(self, food_data: Dict, title: str = "Macronutrient Distribution") -> go.Figure:
         """
@@ -35,94 +175,95 @@ class DashboardCharts:
         Returns:
             go.Figure: Plotly pie chart
         """
-        try:
-            # Calculate calories from macronutrients
-            protein_cals = food_data.get('Protein (g)', 0) * 4
-            carb_cals = food_data.get('Carbohydrate (g)', 0) * 4
-            fat_cals = food_data.get('Total Fat (g)', 0) * 9
-            
-            # Handle case where all values are zero
-            total_cals = protein_cals + carb_cals + fat_cals
-            if total_cals == 0:
-                return self._create_empty_chart("No macronutrient data available")
-            
-            labels = ['Protein', 'Carbohydrates', 'Fat']
-            values = [protein_cals, carb_cals, fat_cals]
-            colors = [self.color_palette['danger'], self.color_palette['warning'], self.color_palette['success']]
-            
-            fig = go.Figure(data=[go.Pie(
-                labels=labels,
-                values=values,
-                hole=0.4,
-                marker=dict(colors=colors),
-                textinfo='label+percent',
-                hovertemplate='<b>%{label}</b><br>%{value:.1f} kcal<br>%{percent}<extra></extra>'
-            )])
-            
-            fig.update_layout(
-                title=dict(text=title, x=0.5, font=dict(size=16)),
-                showlegend=True,
-                height=400,
-                margin=dict(t=50, b=20, l=20, r=20)
-            )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating pie chart: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        # Calculate calories from macronutrients; missing values count as zero
+        protein_cals = (food_data.get('Protein (g)') or 0) * 4
+        carb_cals = (food_data.get('Carbohydrate (g)') or 0) * 4
+        fat_cals = (food_data.get('Total Fat (g)') or 0) * 9
+        
+        # Handle case where all values are zero, or NaN made it through
+        total_cals = protein_cals + carb_cals + fat_cals
+        if not total_cals > 0:
+            return self._create_empty_chart("No macronutrient data available")
+        
+        labels = ['Protein', 'Carbohydrates', 'Fat']
+        values = [protein_cals, carb_cals, fat_cals]
+        colors = [self.color_palette['danger'], self.color_palette['warning'], self.color_palette['success']]
+        
+        fig = go.Figure(data=[go.Pie(
+            labels=labels,
+            values=values,
+            hole=0.4,
+            marker=dict(colors=colors),
+            textinfo='label+percent',
+            hovertemplate='<b>%{label}</b><br>%{value:.1f} kcal<br>%{percent}<extra></extra>'
+        )])
+        
+        fig.update_layout(
+            template=self._template,
+            title=dict(text=title),
+            showlegend=True,
+            margin=dict(b=20, l=20, r=20)
+        )
+        
+        return fig
     
-    def create_nutrient_comparison_bar(self, foods: List[Dict], nutrients: List[str], 
+    def create_nutrient_comparison_bar(self, foods: Union[List[Dict], pd.DataFrame], nutrients: List[str], 
                                      title: str = "Nutrient Comparison") -> go.Figure:
         """
         Create a grouped bar chart comparing nutrients across multiple foods
         
         Args:
-            foods (List[Dict]): List of food items
+            foods (Union[List[Dict], pd.DataFrame]): Food items, as records or columns
             nutrients (List[str]): List of nutrients to compare
             title (str): Chart title
             
         Returns:
             go.Figure: Plotly bar chart
         """
-        try:
-            if not foods or not nutrients:
-                return self._create_empty_chart("No data available for comparison")
-            
-            fig = go.Figure()
-            
-            # Create bars for each nutrient
-            for i, nutrient in enumerate(nutrients):
-                food_names = [food.get('Main food description', 'Unknown')[:30] + '...' 
-                             if len(food.get('Main food description', '')) > 30 
-                             else food.get('Main food description', 'Unknown') for food in foods]
-                
-                values = [food.get(nutrient, 0) for food in foods]
-                
-                fig.add_trace(go.Bar(
-                    name=nutrient.replace(' (g)', '').replace(' (mg)', '').replace(' (kcal)', ''),
-                    x=food_names,
-                    y=values,
-                    marker_color=self.color_palette['nutrients'][i % len(self.color_palette['nutrients'])],
-                    hovertemplate=f'<b>%{{x}}</b><br>{nutrient}: %{{y}}<extra></extra>'
-                ))
-            
-            fig.update_layout(
-                title=dict(text=title, x=0.5, font=dict(size=16)),
-                xaxis_title="Foods",
-                yaxis_title="Amount",
-                barmode='group',
-                height=500,
-                xaxis=dict(tickangle=45),
-                margin=dict(t=50, b=100, l=50, r=20),
-                showlegend=True
-            )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating bar chart: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        if len(foods) == 0 or not nutrients:
+            return self._create_empty_chart("No data available for comparison")
+        
+        foods_df = foods if isinstance(foods, pd.DataFrame) else pd.DataFrame(foods)
+        
+        # Truncate long food names once for all traces
+        names = foods_df.get('Main food description', pd.Series('Unknown', index=foods_df.index))
+        names = names.fillna('Unknown').astype(str)
+        food_names = np.where(names.str.len() > 30, names.str.slice(0, 30) + '...', names).tolist()
+        
+        # Trace names and colors depend only on the nutrient list
+        palette = self.color_palette['nutrients']
+        display_names = [self._strip_unit(n) for n in nutrients]
+        colors = [palette[i % len(palette)] for i in range(len(nutrients))]
+        
+        # Create bars for each nutrient
+        traces = []
+        for nutrient, display_name, color in zip(nutrients, display_names, colors):
+            if nutrient in foods_df.columns:
+                values = foods_df[nutrient].fillna(0).to_numpy()
+            else:
+                values = np.zeros(len(foods_df))
+            
+            traces.append(go.Bar(
+                name=display_name,
+                x=food_names,
+                y=values,
+                marker_color=color,
+                hovertemplate=f'<b>%{{x}}</b><br>{nutrient}: %{{y:.2f}}<extra></extra>'
+            ))
+        
+        fig = go.Figure(data=traces, layout=go.Layout(
+            template=self._template,
+            title=dict(text=title),
+            xaxis_title="Foods",
+            yaxis_title="Amount",
+            barmode='group',
+            height=500,
+            xaxis=dict(tickangle=45),
+            margin=dict(b=100, r=20),
+            showlegend=True
+        ))
+        
+        return fig
     
     def create_nutrient_density_scatter(self, df: pd.DataFrame, x_nutrient: str, 
                                       y_nutrient: str, size_nutrient: str = None,
@@ -140,73 +281,93 @@ class DashboardCharts:
         Returns:
             go.Figure: Plotly scatter plot
         """
-        try:
-            if x_nutrient not in df.columns or y_nutrient not in df.columns:
-                return self._create_empty_chart("Selected nutrients not found in database")
-            
-            # Filter out zero values for better visualization
-            filtered_df = df[(df[x_nutrient] > 0) & (df[y_nutrient] > 0)].copy()
-            
-            if filtered_df.empty:
-                return self._create_empty_chart("No data points with non-zero values")
-            
-            # Limit to top 200 foods for performance
-            filtered_df = filtered_df.head(200)
-            
-            hover_text = []
-            for _, row in filtered_df.iterrows():
-                text = f"<b>{row['Main food description'][:40]}</b><br>"
-                text += f"{x_nutrient}: {row[x_nutrient]:.2f}<br>"
-                text += f"{y_nutrient}: {row[y_nutrient]:.2f}"
-                if size_nutrient and size_nutrient in df.columns:
-                    text += f"<br>{size_nutrient}: {row[size_nutrient]:.2f}"
-                hover_text.append(text)
-            
-            if size_nutrient and size_nutrient in df.columns:
-                fig = go.Figure(data=go.Scatter(
-                    x=filtered_df[x_nutrient],
-                    y=filtered_df[y_nutrient],
-                    mode='markers',
-                    marker=dict(
-                        size=filtered_df[size_nutrient],
-                        sizemode='diameter',
-                        sizeref=2. * max(filtered_df[size_nutrient]) / (40.**2),
-                        sizemin=4,
-                        color=filtered_df[size_nutrient],
-                        colorscale='Viridis',
-                        showscale=True,
-                        colorbar=dict(title=size_nutrient)
-                    ),
-                    hovertemplate='%{hovertext}<extra></extra>',
-                    hovertext=hover_text
-                ))
-            else:
-                fig = go.Figure(data=go.Scatter(
-                    x=filtered_df[x_nutrient],
-                    y=filtered_df[y_nutrient],
-                    mode='markers',
-                    marker=dict(
-                        size=8,
-                        color=self.color_palette['primary'],
-                        opacity=0.7
-                    ),
-                    hovertemplate='%{hovertext}<extra></extra>',
-                    hovertext=hover_text
-                ))
-            
-            fig.update_layout(
-                title=dict(text=title, x=0.5, font=dict(size=16)),
-                xaxis_title=x_nutrient,
-                yaxis_title=y_nutrient,
-                height=500,
-                margin=dict(t=50, b=50, l=50, r=50)
+        if x_nutrient not in df.columns or y_nutrient not in df.columns:
+            return self._create_empty_chart("Selected nutrients not found in database")
+        if 'Main food description' not in df.columns:
+            return self._create_empty_chart("Food descriptions not found in database")
+        
+        # Filter out zero values for better visualization
+        x_all = df[x_nutrient].to_numpy()
+        y_all = df[y_nutrient].to_numpy()
+        idx = np.flatnonzero((x_all > 0) & (y_all > 0))
+        
+        if idx.size == 0:
+            return self._create_empty_chart("No data points with non-zero values")
+        
+        # Downsample large point clouds so the browser payload stays bounded
+        if idx.size > MAX_SCATTER_POINTS:
+            idx = idx[_lttb_indices(x_all[idx], y_all[idx], MAX_SCATTER_POINTS)]
+        
+        # Build hover text from column arrays instead of iterating rows
+        descriptions = df['Main food description'].to_numpy()[idx]
+        x_values = x_all[idx]
+        y_values = y_all[idx]
+
+        hover_text = [
+            f"<b>{str(desc)[:40]}</b><br>{x_nutrient}: {x:.2f}<br>{y_nutrient}: {y:.2f}"
+            for desc, x, y in zip(descriptions, x_values, y_values)
+        ]
+
+        if size_nutrient and size_nutrient in df.columns:
+            # Plotly rejects NaN or negative marker sizes, so treat them as zero
+            size_values = np.clip(
+                np.nan_to_num(df[size_nutrient].to_numpy(dtype=float, na_value=0)[idx]), 0, None
             )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating scatter plot: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+            hover_text = [
+                f"{text}<br>{size_nutrient}: {s:.2f}"
+                for text, s in zip(hover_text, size_values)
+            ]
+        
+        scatter = go.Scattergl if idx.size > WEBGL_POINT_THRESHOLD else go.Scatter
+        
+        if size_nutrient and size_nutrient in df.columns:
+            marker = dict(
+                size=size_values,
+                sizemode='diameter',
+                sizemin=4,
+                color=size_values,
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title=size_nutrient)
+            )
+            # Scale bubbles to the largest value; an all-zero size column has
+            # none, so leave Plotly's default scale
+            largest = np.nanmax(size_values)
+            if largest > 0:
+                marker['sizeref'] = 2. * largest / (40.**2)
+            
+            fig = go.Figure(data=scatter(
+                x=x_values,
+                y=y_values,
+                mode='markers',
+                marker=marker,
+                hovertemplate='%{hovertext}<extra></extra>',
+                hovertext=hover_text
+            ))
+        else:
+            fig = go.Figure(data=scatter(
+                x=x_values,
+                y=y_values,
+                mode='markers',
+                marker=dict(
+                    size=8,
+                    color=self.color_palette['primary'],
+                    opacity=0.7
+                ),
+                hovertemplate='%{hovertext}<extra></extra>',
+                hovertext=hover_text
+            ))
+        
+        fig.update_layout(
+            template=self._template,
+            title=dict(text=title),
+            xaxis_title=x_nutrient,
+            yaxis_title=y_nutrient,
+            height=500,
+            hovermode='closest'
+        )
+        
+        return fig
     
     def create_top_foods_chart(self, df: pd.DataFrame, nutrient: str, top_n: int = 10,
                               title: str = None) -> go.Figure:
@@ -222,49 +383,48 @@ class DashboardCharts:
         Returns:
             go.Figure: Plotly horizontal bar chart
         """
-        try:
-            if nutrient not in df.columns:
-                return self._create_empty_chart(f"Nutrient '{nutrient}' not found in database")
-            
-            # Get top foods
-            top_foods = df.nlargest(top_n, nutrient)
-            top_foods = top_foods[top_foods[nutrient] > 0]  # Remove zero values
-            
-            if top_foods.empty:
-                return self._create_empty_chart(f"No foods found with {nutrient} data")
-            
-            # Truncate long food names
-            food_names = [name[:50] + '...' if len(name) > 50 else name 
-                         for name in top_foods['Main food description']]
-            
-            fig = go.Figure(data=go.Bar(
-                y=food_names,
-                x=top_foods[nutrient],
-                orientation='h',
-                marker=dict(
-                    color=self.color_palette['primary'],
-                    colorscale='Blues',
-                    showscale=False
-                ),
-                hovertemplate='<b>%{y}</b><br>%{x:.2f} ' + self._get_nutrient_unit(nutrient) + '<extra></extra>'
-            ))
-            
-            chart_title = title or f"Top {top_n} Foods - {nutrient}"
-            
-            fig.update_layout(
-                title=dict(text=chart_title, x=0.5, font=dict(size=16)),
-                xaxis_title=f"{nutrient}",
-                yaxis_title="Foods",
-                height=max(400, top_n * 40),
-                margin=dict(t=50, b=50, l=200, r=50),
-                yaxis=dict(categoryorder='total ascending')
-            )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating top foods chart: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        if nutrient not in df.columns:
+            return self._create_empty_chart(f"Nutrient '{nutrient}' not found in database")
+        if 'Main food description' not in df.columns:
+            return self._create_empty_chart("Food descriptions not found in database")
+        if top_n < 1:
+            return self._create_empty_chart("Number of foods must be at least 1")
+        
+        # Get top foods
+        top_foods = _top_foods(df, nutrient, top_n)
+        
+        if top_foods.empty:
+            return self._create_empty_chart(f"No foods found with {nutrient} data")
+        
+        # Truncate long food names
+        names = top_foods['Main food description']
+        food_names = np.where(names.str.len() > 50, names.str.slice(0, 50) + '...', names).tolist()
+        
+        fig = go.Figure(data=go.Bar(
+            y=food_names,
+            x=top_foods[nutrient],
+            orientation='h',
+            marker=dict(
+                color=self.color_palette['primary'],
+                colorscale='Blues',
+                showscale=False
+            ),
+            hovertemplate='<b>%{y}</b><br>%{x:.2f} ' + self._get_nutrient_unit(nutrient) + '<extra></extra>'
+        ))
+        
+        chart_title = title or f"Top {top_n} Foods - {nutrient}"
+        
+        fig.update_layout(
+            template=self._template,
+            title=dict(text=chart_title),
+            xaxis_title=f"{nutrient}",
+            yaxis_title="Foods",
+            height=max(400, top_n * 40),
+            margin=dict(l=200),
+            yaxis=dict(categoryorder='total ascending')
+        )
+        
+        return fig
     
     def create_nutrient_distribution_histogram(self, df: pd.DataFrame, nutrient: str,
                                              bins: int = 30, title: str = None) -> go.Figure:
@@ -280,51 +440,53 @@ class DashboardCharts:
         Returns:
             go.Figure: Plotly histogram
         """
-        try:
-            if nutrient not in df.columns:
-                return self._create_empty_chart(f"Nutrient '{nutrient}' not found in database")
-            
-            # Filter out zero values for better distribution visualization
-            data = df[df[nutrient] > 0][nutrient]
-            
-            if data.empty:
-                return self._create_empty_chart(f"No non-zero values found for {nutrient}")
-            
-            fig = go.Figure(data=go.Histogram(
-                x=data,
-                nbinsx=bins,
-                marker=dict(
-                    color=self.color_palette['primary'],
-                    opacity=0.7
-                ),
-                hovertemplate='Range: %{x}<br>Count: %{y}<extra></extra>'
-            ))
-            
-            chart_title = title or f"Distribution of {nutrient}"
-            
-            fig.update_layout(
-                title=dict(text=chart_title, x=0.5, font=dict(size=16)),
-                xaxis_title=f"{nutrient}",
-                yaxis_title="Number of Foods",
-                height=400,
-                margin=dict(t=50, b=50, l=50, r=50),
-                bargap=0.1
-            )
-            
-            # Add statistics annotation
-            mean_val = data.mean()
-            median_val = data.median()
-            
-            fig.add_vline(x=mean_val, line_dash="dash", line_color="red", 
-                         annotation_text=f"Mean: {mean_val:.2f}")
-            fig.add_vline(x=median_val, line_dash="dash", line_color="green", 
-                         annotation_text=f"Median: {median_val:.2f}")
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating histogram: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        if nutrient not in df.columns:
+            return self._create_empty_chart(f"Nutrient '{nutrient}' not found in database")
+        if bins < 1:
+            return self._create_empty_chart("Number of bins must be at least 1")
+        
+        # Filter out zero values for better distribution visualization
+        data = df[nutrient].to_numpy(dtype=np.float32)
+        data = data[data > 0]
+        
+        if data.size == 0:
+            return self._create_empty_chart(f"No non-zero values found for {nutrient}")
+        
+        # Bin on the server so only bin counts are sent to the browser
+        counts, edges = np.histogram(data, bins=bins)
+        centers = (edges[:-1] + edges[1:]) / 2
+        
+        fig = go.Figure(data=go.Bar(
+            x=centers,
+            y=counts,
+            width=np.diff(edges) * 0.9,  # Leave a small gap between bars
+            customdata=np.column_stack([edges[:-1], edges[1:]]),
+            marker=dict(
+                color=self.color_palette['primary'],
+                opacity=0.7
+            ),
+            hovertemplate='Range: %{customdata[0]:.2f} - %{customdata[1]:.2f}<br>Count: %{y}<extra></extra>'
+        ))
+        
+        chart_title = title or f"Distribution of {nutrient}"
+        
+        fig.update_layout(
+            template=self._template,
+            title=dict(text=chart_title),
+            xaxis_title=f"{nutrient}",
+            yaxis_title="Number of Foods"
+        )
+        
+        # Add statistics annotation
+        mean_val = data.mean()
+        median_val = np.median(data)
+        
+        fig.add_vline(x=mean_val, line_dash="dash", line_color="red", 
+                     annotation_text=f"Mean: {mean_val:.2f}")
+        fig.add_vline(x=median_val, line_dash="dash", line_color="green", 
+                     annotation_text=f"Median: {median_val:.2f}")
+        
+        return fig
     
     def create_correlation_heatmap(self, df: pd.DataFrame, nutrients: List[str] = None,
                                   title: str = "Nutrient Correlation Matrix") -> go.Figure:
@@ -339,131 +501,122 @@ class DashboardCharts:
         Returns:
             go.Figure: Plotly heatmap
         """
-        try:
-            if nutrients is None:
-                # Default nutrients for correlation
-                nutrients = [
-                    'Energy (kcal)', 'Protein (g)', 'Carbohydrate (g)', 'Total Fat (g)',
-                    'Fiber, total dietary (g)', 'Sugars, total (g)', 'Sodium (mg)',
-                    'Calcium (mg)', 'Iron (mg)', 'Vitamin C (mg)'
-                ]
-            
-            # Filter available nutrients
-            available_nutrients = [n for n in nutrients if n in df.columns]
-            
-            if len(available_nutrients) < 2:
-                return self._create_empty_chart("Not enough nutrients available for correlation")
-            
-            # Calculate correlation matrix
-            corr_data = df[available_nutrients].corr()
-            
-            # Create heatmap
-            fig = go.Figure(data=go.Heatmap(
-                z=corr_data.values,
-                x=[n.replace(' (g)', '').replace(' (mg)', '').replace(' (kcal)', '') 
-                   for n in corr_data.columns],
-                y=[n.replace(' (g)', '').replace(' (mg)', '').replace(' (kcal)', '') 
-                   for n in corr_data.index],
-                colorscale='RdBu',
-                zmid=0,
-                text=np.round(corr_data.values, 2),
-                texttemplate="%{text}",
-                textfont={"size": 10},
-                hovertemplate='<b>%{y} vs %{x}</b><br>Correlation: %{z:.3f}<extra></extra>'
-            ))
-            
-            fig.update_layout(
-                title=dict(text=title, x=0.5, font=dict(size=16)),
-                height=500,
-                margin=dict(t=50, b=50, l=100, r=50),
-                xaxis=dict(tickangle=45)
-            )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating correlation heatmap: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        if nutrients is None:
+            # Default nutrients for correlation
+            nutrients = [
+                'Energy (kcal)', 'Protein (g)', 'Carbohydrate (g)', 'Total Fat (g)',
+                'Fiber, total dietary (g)', 'Sugars, total (g)', 'Sodium (mg)',
+                'Calcium (mg)', 'Iron (mg)', 'Vitamin C (mg)'
+            ]
+        
+        # Filter available nutrients
+        available_nutrients = [n for n in nutrients if n in df.columns]
+        
+        if len(available_nutrients) < 2:
+            return self._create_empty_chart("Not enough nutrients available for correlation")
+        
+        # Calculate correlation matrix
+        corr_data = _correlation_matrix(df, tuple(available_nutrients))
+        
+        labels = [self._strip_unit(n) for n in available_nutrients]
+        
+        # Create heatmap
+        fig = go.Figure(data=go.Heatmap(
+            z=corr_data.astype(np.float32),
+            x=labels,
+            y=labels,
+            colorscale='RdBu',
+            zmid=0,
+            text=np.round(corr_data, 2),
+            texttemplate="%{text}",
+            textfont={"size": 10},
+            hovertemplate='<b>%{y} vs %{x}</b><br>Correlation: %{z:.3f}<extra></extra>'
+        ))
+        
+        fig.update_layout(
+            template=self._template,
+            title=dict(text=title),
+            height=500,
+            margin=dict(l=100),
+            xaxis=dict(tickangle=45)
+        )
+        
+        return fig
     
-    def create_meal_planning_chart(self, selected_foods: List[Dict], 
+    def create_meal_planning_chart(self, selected_foods: Union[List[Dict], pd.DataFrame], 
                                  daily_targets: Dict = None,
                                  title: str = "Meal Nutrition Summary") -> go.Figure:
         """
         Create a chart showing nutritional totals for selected foods vs daily targets
         
         Args:
-            selected_foods (List[Dict]): List of selected food items with portions
+            selected_foods (Union[List[Dict], pd.DataFrame]): Selected food items with portions
             daily_targets (Dict): Daily nutritional targets
             title (str): Chart title
             
         Returns:
             go.Figure: Plotly grouped bar chart
         """
-        try:
-            if not selected_foods:
-                return self._create_empty_chart("No foods selected for meal planning")
-            
-            # Default daily targets (based on general recommendations)
-            if daily_targets is None:
-                daily_targets = {
-                    'Energy (kcal)': 2000,
-                    'Protein (g)': 50,
-                    'Carbohydrate (g)': 250,
-                    'Total Fat (g)': 65,
-                    'Fiber, total dietary (g)': 25,
-                    'Sodium (mg)': 2300
-                }
-            
-            # Calculate totals from selected foods
-            totals = {}
-            for nutrient in daily_targets.keys():
-                total = 0
-                for food in selected_foods:
-                    portion = food.get('portion', 100) / 100  # Convert from grams to ratio
-                    total += food.get(nutrient, 0) * portion
-                totals[nutrient] = total
-            
-            nutrients = list(daily_targets.keys())
-            current_values = [totals.get(n, 0) for n in nutrients]
-            target_values = [daily_targets.get(n, 0) for n in nutrients]
-            
-            fig = go.Figure()
-            
-            # Add current values bars
-            fig.add_trace(go.Bar(
+        if len(selected_foods) == 0:
+            return self._create_empty_chart("No foods selected for meal planning")
+        
+        # Default daily targets (based on general recommendations)
+        if daily_targets is None:
+            daily_targets = {
+                'Energy (kcal)': 2000,
+                'Protein (g)': 50,
+                'Carbohydrate (g)': 250,
+                'Total Fat (g)': 65,
+                'Fiber, total dietary (g)': 25,
+                'Sodium (mg)': 2300
+            }
+        
+        nutrients = list(daily_targets.keys())
+        
+        # Calculate totals from selected foods in a single weighted sum
+        if isinstance(selected_foods, pd.DataFrame):
+            foods_df = selected_foods
+        else:
+            foods_df = pd.DataFrame(selected_foods)
+        portions = foods_df.get('portion', pd.Series(100, index=foods_df.index))
+        portions = portions.fillna(100).to_numpy(dtype=float) / 100  # Convert from grams to ratio
+        values = foods_df.reindex(columns=nutrients).fillna(0).to_numpy(dtype=float)
+        current_values = portions @ values
+        target_values = np.array([daily_targets.get(n, 0) for n in nutrients], dtype=float)
+        
+        traces = [
+            # Current values bars
+            go.Bar(
                 name='Current',
                 x=nutrients,
                 y=current_values,
                 marker_color=self.color_palette['primary'],
                 hovertemplate='<b>%{x}</b><br>Current: %{y:.1f}<extra></extra>'
-            ))
-            
-            # Add target values bars
-            fig.add_trace(go.Bar(
+            ),
+            # Target values bars
+            go.Bar(
                 name='Target',
                 x=nutrients,
                 y=target_values,
                 marker_color=self.color_palette['secondary'],
                 opacity=0.7,
                 hovertemplate='<b>%{x}</b><br>Target: %{y:.1f}<extra></extra>'
-            ))
-            
-            fig.update_layout(
-                title=dict(text=title, x=0.5, font=dict(size=16)),
-                xaxis_title="Nutrients",
-                yaxis_title="Amount",
-                barmode='group',
-                height=500,
-                margin=dict(t=50, b=100, l=50, r=20),
-                xaxis=dict(tickangle=45),
-                showlegend=True
             )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating meal planning chart: {str(e)}")
-            return self._create_empty_chart("Error creating chart")
+        ]
+        
+        fig = go.Figure(data=traces, layout=go.Layout(
+            template=self._template,
+            title=dict(text=title),
+            xaxis_title="Nutrients",
+            yaxis_title="Amount",
+            barmode='group',
+            height=500,
+            margin=dict(b=100, r=20),
+            xaxis=dict(tickangle=45),
+            showlegend=True
+        ))
+        
+        return fig
     
     def _create_empty_chart(self, message: str) -> go.Figure:
         """
@@ -475,23 +628,24 @@ class DashboardCharts:
         Returns:
             go.Figure: Empty chart with message
         """
-        fig = go.Figure()
-        fig.add_annotation(
-            text=message,
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16, color="gray")
-        )
-        fig.update_layout(
-            height=400,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            margin=dict(t=50, b=50, l=50, r=50)
-        )
-        return fig
+        # Copy the cached figure so callers can modify it safely
+        return go.Figure(_empty_chart(message, self._template))
+    
+    def _strip_unit(self, nutrient: str) -> str:
+        """
+        Remove the unit suffix from a nutrient name
+        
+        Args:
+            nutrient (str): Nutrient name
+            
+        Returns:
+            str: Nutrient name without its unit
+        """
+        return _UNIT_RE.sub('', nutrient)
     
-    def _get_nutrient_unit(self, nutrient: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _get_nutrient_unit(nutrient: str) -> str:
         """
         Get the unit for a nutrient
         
@@ -1,9 +1,127 @@
 # data_processor.py
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from typing import Dict, List, Optional, Tuple
 import streamlit as st
+import csv
 import os
+import weakref
+from functools import reduce
+
+# Search and food code indexes, keyed by id() of the DataFrame they index
+_frame_indexes: Dict[int, tuple] = {}
+# Version of the cleaned table layout saved in the Parquet cache. Bump it when
+# the loaded columns, their types or the cleaning change, so stale caches are
+# rebuilt from the CSV instead of being served with the old layout
+PARQUET_CACHE_VERSION = 1
+
+# Built-in sample foods, used when no database file can be loaded
+_SAMPLE_DATA = {
+    'Food code': ['11100000', '11111000', '21201000', '23101000', '13101000', 
+                 '15121000', '18601000', '19101000', '63101000', '74101000'],
+    'Main food description': [
+        'Milk, reduced fat', 'Milk, whole', 'Apple, raw', 'Chicken breast, cooked',
+        'Egg, whole, cooked', 'Salmon, cooked', 'White bread', 'Rice, cooked',
+        'Broccoli, cooked', 'Banana, raw'
+    ],
+    'Energy (kcal)': [52, 61, 52, 165, 155, 208, 265, 130, 34, 89],
+    'Protein (g)': [3.33, 3.27, 0.26, 31.02, 13.0, 25.4, 9.0, 2.7, 2.8, 1.1],
+    'Carbohydrate (g)': [4.83, 4.63, 13.81, 0, 1.1, 0, 49.0, 28.2, 7.0, 22.8],
+    'Total Fat (g)': [2.14, 3.2, 0.17, 3.57, 10.6, 12.4, 3.2, 0.3, 0.4, 0.3],
+    'Fiber, total dietary (g)': [0, 0, 2.4, 0, 0, 0, 2.7, 0.4, 5.1, 2.6],
+    'Sugars, total (g)': [4.88, 4.81, 10.39, 0, 0.6, 0, 5.0, 0.1, 1.5, 12.2],
+    'Sodium (mg)': [39, 38, 1, 74, 124, 59, 681, 1, 41, 1],
+    'Calcium (mg)': [125, 123, 6, 15, 50, 12, 151, 10, 47, 5],
+    'Iron (mg)': [0, 0, 0.12, 1.04, 1.8, 0.8, 3.6, 0.8, 0.7, 0.3],
+    'Vitamin C (mg)': [0.1, 0, 4.6, 0, 0, 0, 0, 0, 89.2, 8.7]
+}
+_SAMPLE_TABLE = pa.table({
+    col: pa.array(values, pa.string() if col in ('Food code', 'Main food description')
+                  else pa.float32())
+    for col, values in _SAMPLE_DATA.items()
+})
+_SAMPLE_TABLE = _SAMPLE_TABLE.append_column(
+    '_desc_lower', pc.utf8_lower(_SAMPLE_TABLE['Main food description'])
+)
+
+def _trigrams(data: bytes) -> np.ndarray:
+    """
+    Pack every three-byte window of a byte string into one integer
+    
+    Args:
+        data (bytes): UTF-8 text
+        
+    Returns:
+        np.ndarray: uint32 code of the trigram starting at each byte
+    """
+    values = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    return (values[:-2] << 16) | (values[1:-1] << 8) | values[2:]
+
+class _FrameIndex:
+    """
+    Search and food code indexes of one food database
+    
+    The lowercased descriptions are kept as one UTF-8 byte string with row
+    offsets, so row i spans data[offsets[i]:offsets[i + 1]]. The trigram
+    index is derived from that buffer with NumPy: the distinct byte trigrams
+    are sorted in gram_codes, and the rows holding gram_codes[k] are
+    gram_rows[gram_starts[k]:gram_starts[k + 1]].
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        self.data = b''
+        self.offsets = np.zeros(1, dtype=np.int32)
+        if '_desc_lower' in df.columns:
+            descriptions = pc.fill_null(pa.array(df['_desc_lower'], type=pa.string()), '')
+            if isinstance(descriptions, pa.ChunkedArray):
+                descriptions = descriptions.combine_chunks()
+            _, offsets, data = descriptions.buffers()
+            self.offsets = np.frombuffer(offsets, dtype=np.int32)[
+                descriptions.offset:descriptions.offset + len(descriptions) + 1
+            ]
+            self.data = data.to_pybytes() if data is not None else b''
+        
+        # Position of every trigram that lies within a single row
+        starts = self.offsets[:-1].astype(np.int64)
+        counts = np.maximum(self.offsets[1:].astype(np.int64) - starts - 2, 0)
+        rows = np.repeat(np.arange(len(counts), dtype=np.uint64), counts)
+        first = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        grams = _trigrams(self.data)[np.arange(len(rows)) + first]
+        
+        # One entry per (trigram, row), sorted by trigram and then row
+        keys = np.sort((grams.astype(np.uint64) << np.uint64(32)) | rows)
+        keys = keys[np.diff(keys, prepend=keys[:1] + np.uint64(1)) != 0]
+        self.gram_rows = (keys & np.uint64(0xFFFFFFFF)).astype(np.int32)
+        grams = (keys >> np.uint64(32)).astype(np.uint32)
+        gram_starts = np.flatnonzero(np.diff(grams, prepend=grams[:1] + np.uint32(1)) != 0)
+        self.gram_codes = grams[gram_starts]
+        self.gram_starts = np.append(gram_starts, len(keys))
+        
+        # Food code -> row position, built in reverse so the first row wins
+        # for duplicate codes
+        self.codes: Dict[str, int] = {}
+        if 'Food code' in df.columns:
+            codes = df['Food code'].astype(str).to_numpy()
+            self.codes = dict(zip(codes[::-1], range(len(codes) - 1, -1, -1)))
+    
+    def trigram_rows(self, gram: int) -> np.ndarray:
+        """
+        Get the rows whose description contains a trigram
+        
+        Args:
+            gram (int): Packed trigram, as returned by _trigrams
+            
+        Returns:
+            np.ndarray: Sorted row positions
+        """
+        k = int(np.searchsorted(self.gram_codes, gram))
+        if k == len(self.gram_codes) or self.gram_codes[k] != gram:
+            return self.gram_rows[:0]
+        return self.gram_rows[self.gram_starts[k]:self.gram_starts[k + 1]]
 
 class DataProcessor:
     """Handles loading and processing of food database"""
@@ -13,18 +131,60 @@ class DataProcessor:
             'Food code', 'Main food description', 'Energy (kcal)', 
             'Protein (g)', 'Carbohydrate (g)', 'Total Fat (g)'
         ]
+        self.numeric_columns = [
+            'Energy (kcal)', 'Protein (g)', 'Carbohydrate (g)', 'Total Fat (g)',
+            'Fiber, total dietary (g)', 'Sugars, total (g)', 'Sodium (mg)',
+            'Calcium (mg)', 'Iron (mg)', 'Vitamin C (mg)'
+        ]
+        # Only these columns are read from the CSV; the rest are never used
+        self._load_columns = self.required_columns + [
+            col for col in self.numeric_columns if col not in self.required_columns
+        ] + ['Major food group']
+        self._unit_cache: Dict[str, str] = {}
     
-    @st.cache_data
-    def load_food_database(_self, csv_path: str = 'D:/SJRI/Nutrient_Values.csv') -> pd.DataFrame:
+    def load_food_database(self, csv_path: str = 'D:/SJRI/Nutrient_Values.csv') -> Tuple[pd.DataFrame, Dict]:
         """
         Load the USDA food database from CSV
         
+        Nothing is rendered here; callers show the returned status.
+        
+        Args:
+            csv_path (str): Path to the CSV file
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict]: Loaded food database and a load status
+            with 'loaded' (row count), 'sample' (True when the built-in sample
+            data was used), 'warnings' and 'errors' (lists of messages).
+            Numeric columns are read-only views of the Arrow buffers; copy
+            before modifying them in place.
+        """
+        # The cached table and status are shared by every session
+        table, status = self._load_table(csv_path)
+        
+        # split_blocks keeps each column as its own block so the numeric
+        # columns can wrap the cached Arrow buffers instead of being copied
+        df = table.to_pandas(split_blocks=True)
+        for col in ['Food code', '_desc_lower']:
+            if col in df.columns:
+                df[col] = df[col].astype('string[pyarrow]')
+        return df, dict(status)
+    
+    @st.cache_resource(show_spinner=False)
+    def _load_table(_self, csv_path: str) -> Tuple[pa.Table, Dict]:
+        """
+        Load and clean the food database as an Arrow table
+        
+        The table is cached as a single shared resource: Arrow tables are
+        immutable, so every session can read the same buffers without the
+        pickling round trip st.cache_data would do on each call.
+        
         Args:
             csv_path (str): Path to the CSV file
             
         Returns:
-            pd.DataFrame: Loaded food database
+            Tuple[pa.Table, Dict]: Cleaned food database and load status
         """
+        status = {'loaded': 0, 'sample': False, 'warnings': [], 'errors': []}
         try:
             # If no path provided, look for common file names
             if csv_path is None:
@@ -43,98 +203,170 @@ class DataProcessor:
                 
                 # If no file found, create sample data for demo
                 if csv_path is None:
-                    return _self._create_sample_data()
-            
-            # Load the CSV file
-            df = pd.read_csv(csv_path, encoding='utf-8', low_memory=False)
+                    return _self._create_sample_table(status)
+            
+            # Reuse the cleaned Parquet copy when it is newer than the CSV and
+            # was written for the current table layout
+            cache_path = csv_path + '.parquet'
+            if (os.path.exists(cache_path)
+                    and os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)):
+                table = _self._read_parquet_cache(cache_path)
+                if table is not None:
+                    status['loaded'] = table.num_rows
+                    return table, status
+            
+            # Read the header first so missing columns are caught before parsing
+            with open(csv_path, encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), [])
             
             # Validate required columns
-            missing_cols = [col for col in _self.required_columns if col not in df.columns]
+            missing_cols = [col for col in _self.required_columns if col not in header]
             if missing_cols:
-                st.warning(f"Missing columns in dataset: {missing_cols}")
-                return _self._create_sample_data()
+                status['warnings'].append(f"Missing columns in dataset: {missing_cols}")
+                return _self._create_sample_table(status)
+            
+            # Load the CSV file with Arrow's multi-threaded parser, reading only
+            # the columns we use and typing every one of them up front so the
+            # parser never has to infer types
+            read_options = pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+            convert_options = pacsv.ConvertOptions(
+                column_types={
+                    'Food code': pa.string(),
+                    'Main food description': pa.string(),
+                    # Few distinct groups, so dictionary-encode (category in pandas)
+                    'Major food group': pa.dictionary(pa.int32(), pa.string()),
+                    **{col: pa.float32() for col in _self.numeric_columns}
+                },
+                include_columns=[col for col in _self._load_columns if col in header],
+                null_values=['', 'NA', 'N/A', 'NULL', 'null', '\\N'],
+                strings_can_be_null=True
+            )
+            # Memory-map the file so the parser reads the page cache directly
+            with pa.memory_map(csv_path, 'r') as source:
+                table = pacsv.read_csv(source, read_options=read_options,
+                                       convert_options=convert_options)
             
             # Clean and prepare data
-            df = _self._clean_data(df)
+            table = _self._clean_table(table)
+            _self._write_parquet_cache(table, cache_path)
             
-            st.success(f"✅ Loaded {len(df)} food items from database")
-            return df
+            status['loaded'] = table.num_rows
+            return table, status
             
         except FileNotFoundError:
-            st.error(f"Food database file not found: {csv_path}")
-            return _self._create_sample_data()
+            status['errors'].append(f"Food database file not found: {csv_path}")
+            return _self._create_sample_table(status)
         except Exception as e:
-            st.error(f"Error loading food database: {str(e)}")
-            return _self._create_sample_data()
+            status['errors'].append(f"Error loading food database: {str(e)}")
+            return _self._create_sample_table(status)
     
-    def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _read_parquet_cache(self, cache_path: str) -> Optional[pa.Table]:
         """
-        Clean and prepare the food database
+        Read the cleaned food database from its Parquet cache
         
         Args:
-            df (pd.DataFrame): Raw food database
+            cache_path (str): Path of the Parquet file
             
         Returns:
-            pd.DataFrame: Cleaned food database
+            Optional[pa.Table]: Cached food database, or None when the cache
+            can't be read or is stale and the CSV should be parsed instead
         """
         try:
-            # Convert numeric columns
-            numeric_columns = [
-                'Energy (kcal)', 'Protein (g)', 'Carbohydrate (g)', 'Total Fat (g)',
-                'Fiber, total dietary (g)', 'Sugars, total (g)', 'Sodium (mg)',
-                'Calcium (mg)', 'Iron (mg)', 'Vitamin C (mg)'
-            ]
-            
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-            # Clean food descriptions
-            df['Main food description'] = df['Main food description'].astype(str).str.strip()
-            
-            # Remove rows with missing essential data
-            df = df.dropna(subset=['Main food description'])
-            df = df[df['Main food description'] != '']
-            
-            # Ensure Food code is string
-            df['Food code'] = df['Food code'].astype(str)
-            
-            return df
+            # Check the footer before reading any column data
+            schema = pq.read_schema(cache_path)
+            expected_columns = set(self._load_columns) | {'_desc_lower'}
+            if ((schema.metadata or {}).get(b'cache_tag') == self._cache_tag()
+                    and set(self.required_columns) <= set(schema.names) <= expected_columns):
+                return pq.read_table(cache_path)
+        except (OSError, pa.ArrowException):
+            pass
+        
+        # Unreadable, corrupt or stale cache; remove it so the CSV rebuilds it
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+    
+    def _write_parquet_cache(self, table: pa.Table, cache_path: str) -> None:
+        """
+        Save the cleaned food database as Parquet for faster later loads
+        
+        The file is written under a temporary name and then renamed, so an
+        interrupted write never leaves a truncated cache behind.
+        
+        Args:
+            table (pa.Table): Cleaned food database
+            cache_path (str): Path of the Parquet file
+        """
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        metadata = {**(table.schema.metadata or {}), b'cache_tag': self._cache_tag()}
+        try:
+            pq.write_table(table.replace_schema_metadata(metadata), tmp_path,
+                           compression='lz4')
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The data directory may be read-only; loading still works without the cache
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def _cache_tag(self) -> bytes:
+        """
+        Identify the table layout a Parquet cache was written for
+        
+        Returns:
+            bytes: Cache version and the columns read from the CSV
+        """
+        return f"{PARQUET_CACHE_VERSION}:{'|'.join(self._load_columns)}".encode()
+    
+    def _clean_table(self, table: pa.Table) -> pa.Table:
+        """
+        Clean and prepare the food database while it is still an Arrow table
+        
+        Uses Arrow compute kernels, which run on the columnar buffers
+        without going through pandas.
+        
+        Args:
+            table (pa.Table): Raw food database as parsed from the CSV
             
-        except Exception as e:
-            st.error(f"Error cleaning data: {str(e)}")
-            return df
+        Returns:
+            pa.Table: Cleaned food database
+        """
+        # Numeric columns are typed by the CSV reader; fill gaps with zero
+        for col in self.numeric_columns:
+            index = table.schema.get_field_index(col)
+            if index != -1:
+                table = table.set_column(index, col, pc.fill_null(table[col], 0))
+        
+        # Strip descriptions and drop rows where they are missing or empty
+        descriptions = pc.utf8_trim_whitespace(table['Main food description'])
+        table = table.set_column(
+            table.schema.get_field_index('Main food description'),
+            'Main food description', descriptions
+        )
+        table = table.filter(pc.fill_null(pc.not_equal(descriptions, ''), False))
+        
+        # Lowercased descriptions for case-insensitive search
+        return table.append_column(
+            '_desc_lower', pc.utf8_lower(table['Main food description'])
+        )
     
-    def _create_sample_data(self) -> pd.DataFrame:
+    def _create_sample_table(self, status: Dict) -> Tuple[pa.Table, Dict]:
         """
-        Create sample food data for demonstration
+        Create sample food data for demonstration as an Arrow table
         
+        Args:
+            status (Dict): Load status to mark as using sample data
+            
         Returns:
-            pd.DataFrame: Sample food database
-        """
-        sample_data = {
-            'Food code': ['11100000', '11111000', '21201000', '23101000', '13101000', 
-                         '15121000', '18601000', '19101000', '63101000', '74101000'],
-            'Main food description': [
-                'Milk, reduced fat', 'Milk, whole', 'Apple, raw', 'Chicken breast, cooked',
-                'Egg, whole, cooked', 'Salmon, cooked', 'White bread', 'Rice, cooked',
-                'Broccoli, cooked', 'Banana, raw'
-            ],
-            'Energy (kcal)': [52, 61, 52, 165, 155, 208, 265, 130, 34, 89],
-            'Protein (g)': [3.33, 3.27, 0.26, 31.02, 13.0, 25.4, 9.0, 2.7, 2.8, 1.1],
-            'Carbohydrate (g)': [4.83, 4.63, 13.81, 0, 1.1, 0, 49.0, 28.2, 7.0, 22.8],
-            'Total Fat (g)': [2.14, 3.2, 0.17, 3.57, 10.6, 12.4, 3.2, 0.3, 0.4, 0.3],
-            'Fiber, total dietary (g)': [0, 0, 2.4, 0, 0, 0, 2.7, 0.4, 5.1, 2.6],
-            'Sugars, total (g)': [4.88, 4.81, 10.39, 0, 0.6, 0, 5.0, 0.1, 1.5, 12.2],
-            'Sodium (mg)': [39, 38, 1, 74, 124, 59, 681, 1, 41, 1],
-            'Calcium (mg)': [125, 123, 6, 15, 50, 12, 151, 10, 47, 5],
-            'Iron (mg)': [0, 0, 0.12, 1.04, 1.8, 0.8, 3.6, 0.8, 0.7, 0.3],
-            'Vitamin C (mg)': [0.1, 0, 4.6, 0, 0, 0, 0, 0, 89.2, 8.7]
-        }
-        
-        df = pd.DataFrame(sample_data)
-        st.info("📝 Using sample food database. Upload your USDA CSV file for full functionality.")
-        return df
+            Tuple[pa.Table, Dict]: Sample food database and load status
+        """
+        table = _SAMPLE_TABLE
+        status['loaded'] = table.num_rows
+        status['sample'] = True
+        return table, status
     
     def search_foods(self, df: pd.DataFrame, query: str, limit: int = 20) -> List[Dict]:
         """
@@ -148,26 +380,117 @@ class DataProcessor:
         Returns:
             List[Dict]: List of matching food items
         """
-        try:
-            if not query or len(query) < 2:
-                return []
+        if not query or len(query) < 2 or limit <= 0:
+            return []
+        
+        # Case-insensitive search
+        query = query.lower().strip()
+        
+        # Scan the lowercased descriptions prepared by _clean_table as one
+        # byte buffer, stopping once enough rows have matched; frames
+        # without that column fall back to Arrow's substring kernel
+        if '_desc_lower' in df.columns:
+            positions = self._scan_descriptions(df, query, limit)
+        else:
+            descriptions = pa.array(df['Main food description'], type=pa.string())
+            mask = pc.match_substring(descriptions, query, ignore_case=True)
+            positions = np.flatnonzero(
+                pc.fill_null(mask, False).to_numpy(zero_copy_only=False)
+            )[:limit]
+        
+        return self._to_records(df.iloc[positions])
+    
+    def _to_records(self, rows: pd.DataFrame) -> List[Dict]:
+        """
+        Convert food database rows to a list of dictionaries
+        
+        Args:
+            rows (pd.DataFrame): Rows of the food database
             
-            # Case-insensitive search
-            query = query.lower().strip()
+        Returns:
+            List[Dict]: One dictionary of native Python values per row
+        """
+        # Column by column; tolist() yields native Python values without
+        # boxing each row into a Series
+        columns = [col for col in rows.columns if col != '_desc_lower']
+        values = [rows[col].tolist() for col in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+    
+    def _scan_descriptions(self, df: pd.DataFrame, query: str, limit: int) -> List[int]:
+        """
+        Find the first rows whose lowercased description contains the query
+        
+        Args:
+            df (pd.DataFrame): Food database with a _desc_lower column
+            query (str): Lowercased search query
+            limit (int): Maximum number of rows to return
             
-            # Search in food descriptions
-            mask = df['Main food description'].str.lower().str.contains(
-                query, na=False, regex=False
+        Returns:
+            List[int]: Row positions of the matches, in table order
+        """
+        index = self._get_frame_index(df)
+        data, offsets = index.data, index.offsets
+        needle = query.encode('utf-8')
+        
+        positions = []
+        if len(needle) >= 3:
+            # Only rows holding every byte trigram of the query can match;
+            # verify each candidate within its own slice of the buffer
+            postings = [index.trigram_rows(gram) for gram in _trigrams(needle)]
+            postings.sort(key=len)
+            candidates = reduce(
+                lambda a, b: np.intersect1d(a, b, assume_unique=True), postings
             )
+            for row in candidates.tolist():
+                if data.find(needle, offsets[row], offsets[row + 1]) != -1:
+                    positions.append(row)
+                    if len(positions) >= limit:
+                        break
+            start = -1
+        else:
+            start = data.find(needle)
+        
+        while start != -1 and len(positions) < limit:
+            row = int(np.searchsorted(offsets, start, side='right')) - 1
+            row_end = int(offsets[row + 1])
+            if start + len(needle) <= row_end:
+                # Match lies inside one row; continue from the next row
+                positions.append(row)
+                start = data.find(needle, row_end)
+            else:
+                # Match spans two descriptions, so it does not count
+                start = data.find(needle, start + 1)
+        
+        return positions
+    
+    def build_search_index(self, df: pd.DataFrame) -> None:
+        """
+        Build the search and food code indexes for a database ahead of first use
+        
+        Args:
+            df (pd.DataFrame): Food database
+        """
+        key = id(df)
+        cached = _frame_indexes.get(key)
+        if cached is not None and cached[0]() is df:
+            return
+        
+        # Drop the indexes once the DataFrame is garbage collected
+        ref = weakref.ref(df, lambda _, key=key: _frame_indexes.pop(key, None))
+        _frame_indexes[key] = (ref, _FrameIndex(df))
+    
+    def _get_frame_index(self, df: pd.DataFrame) -> '_FrameIndex':
+        """
+        Get the search and food code indexes of a database, building them on first use
+        
+        Args:
+            df (pd.DataFrame): Food database
             
-            results = df[mask].head(limit)
-            
-            # Convert to list of dictionaries
-            return results.to_dict('records')
-            
-        except Exception as e:
-            st.error(f"Search error: {str(e)}")
-            return []
+        Returns:
+            _FrameIndex: Indexes of the database
+        """
+        self.build_search_index(df)
+        return _frame_indexes[id(df)][1]
     
     def get_food_by_code(self, df: pd.DataFrame, food_code: str) -> Optional[Dict]:
         """
@@ -180,15 +503,13 @@ class DataProcessor:
         Returns:
             Optional[Dict]: Food item if found, None otherwise
         """
-        try:
-            result = df[df['Food code'] == str(food_code)]
-            if not result.empty:
-                return result.iloc[0].to_dict()
+        if food_code is None or 'Food code' not in df.columns:
             return None
-            
-        except Exception as e:
-            st.error(f"Error getting food by code: {str(e)}")
+        
+        position = self._get_frame_index(df).codes.get(str(food_code))
+        if position is None:
             return None
+        return self._to_records(df.iloc[[position]])[0]
     
     def get_foods_rich_in_nutrient(self, df: pd.DataFrame, nutrient: str, 
                                  limit: int = 10) -> List[Dict]:
@@ -203,30 +524,30 @@ class DataProcessor:
         Returns:
             List[Dict]: Foods rich in the nutrient
         """
-        try:
-            if nutrient not in df.columns:
-                return []
-            
-            # Sort by nutrient content and get top foods
-            sorted_df = df.nlargest(limit, nutrient)
-            
-            # Filter out foods with zero content
-            sorted_df = sorted_df[sorted_df[nutrient] > 0]
-            
-            results = []
-            for _, row in sorted_df.iterrows():
-                results.append({
-                    'name': row['Main food description'],
-                    'food_code': row['Food code'],
-                    'nutrient_value': row[nutrient],
-                    'unit': self._get_nutrient_unit(nutrient)
-                })
-            
-            return results
-            
-        except Exception as e:
-            st.error(f"Error finding foods rich in {nutrient}: {str(e)}")
+        if nutrient not in df.columns:
+            return []
+        
+        # Only foods with non-zero content qualify
+        values = df[nutrient].to_numpy(dtype=float, na_value=0)
+        top_n = min(limit, int(np.count_nonzero(values > 0)))
+        if top_n <= 0:
             return []
+        
+        # Partial selection of the top rows, then sort only those
+        idx = np.argpartition(-values, top_n - 1)[:top_n]
+        idx = idx[np.argsort(-values[idx], kind='stable')]
+        sorted_df = df.iloc[idx]
+        
+        # Pull the columns out once instead of building a Series per row
+        names = sorted_df['Main food description'].to_numpy()
+        codes = sorted_df['Food code'].to_numpy()
+        values = sorted_df[nutrient].tolist()
+        unit = self._get_nutrient_unit(nutrient)
+        
+        return [
+            {'name': name, 'food_code': code, 'nutrient_value': value, 'unit': unit}
+            for name, code, value in zip(names, codes, values)
+        ]
     
     def _get_nutrient_unit(self, nutrient: str) -> str:
         """
@@ -238,16 +559,23 @@ class DataProcessor:
         Returns:
             str: Unit for the nutrient
         """
+        unit = self._unit_cache.get(nutrient)
+        if unit is not None:
+            return unit
+        
         if '(g)' in nutrient:
-            return 'g'
+            unit = 'g'
         elif '(mg)' in nutrient:
-            return 'mg'
+            unit = 'mg'
         elif '(mcg)' in nutrient:
-            return 'mcg'
+            unit = 'mcg'
         elif '(kcal)' in nutrient:
-            return 'kcal'
+            unit = 'kcal'
         else:
-            return ''
+            unit = ''
+        
+        self._unit_cache[nutrient] = unit
+        return unit
     
     def get_nutrient_statistics(self, df: pd.DataFrame) -> Dict:
         """
@@ -260,20 +588,17 @@ class DataProcessor:
             Dict: Nutrient statistics
         """
         try:
-            stats = {}
             numeric_columns = df.select_dtypes(include=[np.number]).columns
+            nutrient_columns = [
+                col for col in numeric_columns
+                if any(nutrient in col for nutrient in ['Energy', 'Protein', 'Fat', 'Carbohydrate'])
+            ]
+            if not nutrient_columns:
+                return {}
             
-            for col in numeric_columns:
-                if any(nutrient in col for nutrient in ['Energy', 'Protein', 'Fat', 'Carbohydrate']):
-                    stats[col] = {
-                        'mean': df[col].mean(),
-                        'median': df[col].median(),
-                        'std': df[col].std(),
-                        'min': df[col].min(),
-                        'max': df[col].max()
-                    }
-            
-            return stats
+            # One aggregation over all columns instead of five calls per column
+            stats = df[nutrient_columns].agg(['mean', 'median', 'std', 'min', 'max'])
+            return stats.to_dict()
             
         except Exception as e:
             st.error(f"Error calculating nutrient statistics: {str(e)}")
@@ -4,14 +4,15 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Optional
 import os
+from functools import partial
 
 # Import custom modules
-from data_processor import DataProcessor
-from nutrition_analyzer import NutritionAnalyzer
-from food_recommender import FoodRecommender
-from dashboard_charts import DashboardCharts
+from app_cache import (
+    load_food_db, cached_search, cached_recommendations,
+    heatmap_fig, top_foods_fig, get_helpers
+)
 
 # Page configuration
 st.set_page_config(
@@ -21,83 +22,170 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #2E7D32;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-    .food-item {
-        background: #0c0d0d;
-        padding: 0.8rem;
-        border-radius: 8px;
-        margin: 0.3rem 0;
-        border-left: 4px solid #28a745;
-    }
-    .warning-box {
-        background: #fff3cd;
-        border: 1px solid #ffeaa7;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        color: #856404;
-    }
-    .success-box {
-        background: #d4edda;
-        border: 1px solid #c3e6cb;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        color: #155724;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Daily log field and the food database column it is scaled from
+NUTRIENT_KEYS = [
+    ('calories', 'Energy (kcal)'),
+    ('protein', 'Protein (g)'),
+    ('carbs', 'Carbohydrate (g)'),
+    ('fat', 'Total Fat (g)'),
+    ('fiber', 'Fiber, total dietary (g)'),
+    ('sugar', 'Sugars, total (g)'),
+    ('sodium', 'Sodium (mg)'),
+    ('calcium', 'Calcium (mg)'),
+    ('iron', 'Iron (mg)'),
+    ('vitamin_c', 'Vitamin C (mg)')
+]
+
+# Nutrient values come from float32 columns, so exports keep about as many
+# significant digits as float32 holds instead of its rounding noise
+CSV_FLOAT_FORMAT = '%.6g'
+
+# Default daily goals, keyed by food database column; the calorie and
+# protein goals are adjusted from the sidebar
+DEFAULT_DAILY_TARGETS = {
+    'Energy (kcal)': 2000,
+    'Protein (g)': 150,
+    'Carbohydrate (g)': 250,
+    'Total Fat (g)': 65,
+    'Fiber, total dietary (g)': 25,
+    'Sodium (mg)': 2300
+}
+
+# Columns of the daily log frame, one row per logged food
+LOG_COLUMNS = ['name', 'serving_size', 'timestamp', 'food_code'] + [
+    field for field, _ in NUTRIENT_KEYS
+]
+
+def _empty_log() -> pd.DataFrame:
+    """Create an empty daily log with typed columns
+
+    Rows are only ever appended with the current time or dropped, never
+    reordered, so the log stays sorted by timestamp and the first and last
+    rows are the first and last meals.
+    """
+    log = pd.DataFrame(columns=LOG_COLUMNS)
+    return log.astype({
+        'name': object,
+        'food_code': object,
+        'serving_size': float,
+        'timestamp': 'datetime64[us]',
+        **{field: float for field, _ in NUTRIENT_KEYS}
+    })
+
+def _empty_totals() -> Dict[str, float]:
+    """Create zeroed running totals for every tracked nutrient"""
+    return {field: 0.0 for field, _ in NUTRIENT_KEYS}
+
+def _timeline_figure(log: pd.DataFrame) -> go.Figure:
+    """
+    Build the calorie intake timeline for a daily log
+    
+    Args:
+        log (pd.DataFrame): Daily log, one row per logged food
+        
+    Returns:
+        go.Figure: Cumulative calorie line over per-food calorie bars
+    """
+    # Plain lists keep the traces as tuples, so points can be appended later
+    times = log['timestamp'].dt.strftime('%H:%M').tolist()
+    foods = log['name'].where(log['name'].str.len() <= 20, log['name'].str[:20] + '...').tolist()
+    
+    fig = go.Figure()
+    
+    # Add cumulative calories line
+    fig.add_trace(go.Scatter(
+        x=times,
+        y=log['calories'].cumsum().tolist(),
+        mode='lines+markers',
+        name='Cumulative Calories',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Total: %{y:.0f} cal<extra></extra>',
+        text=foods
+    ))
+    
+    # Add individual meal bars
+    fig.add_trace(go.Bar(
+        x=times,
+        y=log['calories'].tolist(),
+        name='Meal Calories',
+        marker_color='rgba(255, 127, 14, 0.6)',
+        hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Calories: %{y:.0f}<extra></extra>',
+        text=foods
+    ))
+    
+    fig.update_layout(
+        title=dict(text="Calorie Intake Timeline", x=0.5, font=dict(size=16)),
+        xaxis_title="Time",
+        yaxis_title="Calories",
+        height=400,
+        margin=dict(t=50, b=50, l=50, r=50),
+        showlegend=True
+    )
+    return fig
 
 class DietTrackerApp:
     def __init__(self):
         """Initialize the Diet Tracker Application"""
         self.init_session_state()
-        self.data_processor = DataProcessor()
-        self.nutrition_analyzer = NutritionAnalyzer()
-        self.food_recommender = FoodRecommender()
-        self.dashboard = DashboardCharts()
+        (
+            self.data_processor,
+            self.nutrition_analyzer,
+            self.food_recommender,
+            self.dashboard
+        ) = get_helpers()
         
     def init_session_state(self):
         """Initialize session state variables"""
         if 'daily_log' not in st.session_state:
-            st.session_state.daily_log = []
+            st.session_state.daily_log = _empty_log()
+        if 'totals' not in st.session_state:
+            # Running nutrient totals of daily_log, updated as foods are added or removed
+            st.session_state.totals = _empty_totals()
+        if 'timeline_fig' not in st.session_state:
+            # Calorie timeline, extended point by point as foods are added
+            st.session_state.timeline_fig = _timeline_figure(st.session_state.daily_log)
         if 'food_data' not in st.session_state:
             st.session_state.food_data = None
         if 'search_results' not in st.session_state:
             st.session_state.search_results = []
+        if 'daily_targets' not in st.session_state:
+            st.session_state.daily_targets = dict(DEFAULT_DAILY_TARGETS)
 
     def load_data(self) -> bool:
         """Load and cache the food database"""
         try:
+            # Only a session's first run can be waiting on the load, so show
+            # the spinner and load messages then
             if st.session_state.food_data is None:
                 with st.spinner("Loading food database..."):
-                    # You would replace this with your actual CSV file path
-                    # For demo purposes, I'll create sample data structure
-                    st.session_state.food_data = self.data_processor.load_food_database()
+                    food_data, status = load_food_db()
+                self.render_load_status(status)
+                st.session_state.food_data = food_data
             return True
         except Exception as e:
             st.error(f"Error loading food database: {str(e)}")
             return False
 
+    def render_load_status(self, status: Dict):
+        """Show the messages from loading the food database"""
+        for message in status['errors']:
+            st.error(message)
+        for message in status['warnings']:
+            st.warning(message)
+        
+        if status['sample']:
+            st.info("📝 Using sample food database. Upload your USDA CSV file for full functionality.")
+        else:
+            st.success(f"✅ Loaded {status['loaded']} food items from database")
+
     def render_header(self):
         """Render the application header"""
-        st.markdown("<h1 class='main-header'>🥗 Smart Diet Tracker</h1>", unsafe_allow_html=True)
+        st.markdown(
+            "<h1 style='font-size: 2.5rem; color: #2E7D32; text-align: center; margin-bottom: 2rem;'>"
+            "🥗 Smart Diet Tracker</h1>",
+            unsafe_allow_html=True
+        )
         st.markdown("Track your daily nutrition intake with intelligent recommendations")
         
         # Current date display
@@ -105,8 +193,14 @@ class DietTrackerApp:
         with col2:
             st.info(f"📅 Today's Date: {datetime.now().strftime('%B %d, %Y')}")
 
+    @st.fragment
     def render_food_search(self):
-        """Render the food search interface"""
+        """
+        Render the food search interface
+        
+        Runs as a fragment so typing a query only reruns the search; adding a
+        food triggers a full rerun to refresh the log and totals.
+        """
         st.subheader("🔍 Search & Add Foods")
         
         # Search input
@@ -118,11 +212,8 @@ class DietTrackerApp:
         
         if search_query:
             try:
-                # Search for foods
-                search_results = self.data_processor.search_foods(
-                    st.session_state.food_data, 
-                    search_query
-                )
+                # Search for foods; reruns with the same query hit the cache
+                search_results = cached_search(search_query.lower().strip())
                 
                 if search_results:
                     st.write(f"Found {len(search_results)} results:")
@@ -133,8 +224,8 @@ class DietTrackerApp:
                         
                         with col1:
                             st.write(f"**{food['Main food description']}**")
-                            st.caption(f"Calories: {food.get('Energy (kcal)', 'N/A')} | "
-                                     f"Protein: {food.get('Protein (g)', 'N/A')}g")
+                            st.caption(f"Calories: {food.get('Energy (kcal)', 0):.0f} | "
+                                     f"Protein: {food.get('Protein (g)', 0):.1f}g")
                         
                         with col2:
                             serving_size = st.number_input(
@@ -161,72 +252,114 @@ class DietTrackerApp:
     def add_food_to_log(self, food: Dict, serving_size: float):
         """Add a food item to the daily log"""
         try:
-            # Calculate nutritional values based on serving size
-            log_entry = {
-                'name': food['Main food description'],
-                'serving_size': serving_size,
-                'timestamp': datetime.now(),
-                'food_code': food.get('Food code', ''),
-                'calories': float(food.get('Energy (kcal)', 0)) * serving_size,
-                'protein': float(food.get('Protein (g)', 0)) * serving_size,
-                'carbs': float(food.get('Carbohydrate (g)', 0)) * serving_size,
-                'fat': float(food.get('Total Fat (g)', 0)) * serving_size,
-                'fiber': float(food.get('Fiber, total dietary (g)', 0)) * serving_size,
-                'sugar': float(food.get('Sugars, total (g)', 0)) * serving_size,
-                'sodium': float(food.get('Sodium (mg)', 0)) * serving_size,
-                'calcium': float(food.get('Calcium (mg)', 0)) * serving_size,
-                'iron': float(food.get('Iron (mg)', 0)) * serving_size,
-                'vitamin_c': float(food.get('Vitamin C (mg)', 0)) * serving_size,
-            }
+            # Calculate nutritional values based on serving size in one multiply
+            values = np.fromiter(
+                (float(food.get(column, 0)) for _, column in NUTRIENT_KEYS),
+                dtype=np.float64, count=len(NUTRIENT_KEYS)
+            ) * serving_size
+            
+            name = food['Main food description']
+            timestamp = datetime.now()
+            log = st.session_state.daily_log
+            log.loc[len(log)] = [
+                name,
+                serving_size,
+                timestamp,
+                food.get('Food code', '')
+            ] + values.tolist()
             
-            st.session_state.daily_log.append(log_entry)
+            # Keep the running totals in step with the log
+            totals = st.session_state.totals
+            for (field, _), value in zip(NUTRIENT_KEYS, values.tolist()):
+                totals[field] += value
+            
+            # Extend the timeline by one point instead of rebuilding it
+            label = name[:20] + '...' if len(name) > 20 else name
+            time = timestamp.strftime('%H:%M')
+            line, bars = st.session_state.timeline_fig.data
+            line.x += (time,)
+            line.y += (totals['calories'],)
+            line.text += (label,)
+            bars.x += (time,)
+            bars.y += (log['calories'].iat[-1],)
+            bars.text += (label,)
             
         except Exception as e:
             st.error(f"Error adding food to log: {str(e)}")
 
+    @st.fragment
     def render_daily_log(self):
-        """Render the daily food log"""
+        """
+        Render the daily food log
+        
+        Runs as a fragment so ticking rows to remove only reruns the log.
+        """
         st.subheader("📝 Today's Food Log")
         
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             st.info("No foods logged yet. Start by searching and adding foods above!")
             return
         
-        # Display logged foods
-        for idx, entry in enumerate(st.session_state.daily_log):
-            with st.container():
-                col1, col2, col3 = st.columns([3, 1, 1])
-                
-                with col1:
-                    st.markdown(f"""
-                    <div class="food-item">
-                        <strong>{entry['name']}</strong><br>
-                        <small>Serving: {entry['serving_size']:.1f} | 
-                        {entry['calories']:.0f} cal | 
-                        P: {entry['protein']:.1f}g | 
-                        C: {entry['carbs']:.1f}g | 
-                        F: {entry['fat']:.1f}g</small>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    st.caption(entry['timestamp'].strftime("%I:%M %p"))
-                
-                with col3:
-                    if st.button("🗑️ Remove", key=f"remove_{idx}"):
-                        st.session_state.daily_log.pop(idx)
-                        st.rerun()
+        log = st.session_state.daily_log
+        
+        # Display logged foods as one table; the first column marks rows to remove
+        table = log[['name', 'serving_size', 'calories', 'protein', 'carbs', 'fat']].copy()
+        table.insert(0, 'remove', False)
+        table['time'] = log['timestamp'].dt.strftime("%I:%M %p")
+        
+        edited = st.data_editor(
+            table,
+            key="daily_log_editor",
+            hide_index=True,
+            use_container_width=True,
+            disabled=[col for col in table.columns if col != 'remove'],
+            column_config={
+                'remove': st.column_config.CheckboxColumn("🗑️", help="Select foods to remove"),
+                'name': st.column_config.TextColumn("Food"),
+                'serving_size': st.column_config.NumberColumn("Serving", format="%.1f"),
+                'calories': st.column_config.NumberColumn("Calories", format="%.0f"),
+                'protein': st.column_config.NumberColumn("Protein (g)", format="%.1f"),
+                'carbs': st.column_config.NumberColumn("Carbs (g)", format="%.1f"),
+                'fat': st.column_config.NumberColumn("Fat (g)", format="%.1f"),
+                'time': st.column_config.TextColumn("Time")
+            }
+        )
+        
+        selected = np.flatnonzero(edited['remove'].to_numpy(dtype=bool))
+        if st.button("🗑️ Remove Selected", key="remove_selected", disabled=len(selected) == 0):
+            self.remove_foods_from_log(selected)
+            # Reset the checkboxes so they do not carry over to the renumbered rows
+            st.session_state.pop("daily_log_editor", None)
+            st.rerun()
+
+    def remove_foods_from_log(self, positions: np.ndarray):
+        """Remove food items from the daily log and subtract them from the totals"""
+        log = st.session_state.daily_log
+        removed = log.iloc[positions]
+        
+        # Renumber rows so positions and labels stay equal
+        st.session_state.daily_log = log.drop(index=log.index[positions]).reset_index(drop=True)
+        st.session_state.timeline_fig = _timeline_figure(st.session_state.daily_log)
+        
+        if st.session_state.daily_log.empty:
+            # Start from exact zeros rather than accumulated rounding error
+            st.session_state.totals = _empty_totals()
+        else:
+            totals = st.session_state.totals
+            removed_sums = removed[[field for field, _ in NUTRIENT_KEYS]].sum()
+            for field, _ in NUTRIENT_KEYS:
+                totals[field] -= float(removed_sums[field])
 
     def render_nutrition_summary(self):
         """Render live nutritional totals"""
         st.subheader("📊 Nutritional Summary")
         
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             st.info("Add foods to see nutritional breakdown")
             return
         
-        # Calculate totals
-        totals = self.nutrition_analyzer.calculate_totals(st.session_state.daily_log)
+        # Running totals of the log
+        totals = st.session_state.totals
         
         # Display main metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -242,56 +375,52 @@ class DietTrackerApp:
         
         # Additional nutrients
         with st.expander("View More Nutrients"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Fiber", f"{totals['fiber']:.1f}g")
-                st.metric("Sugar", f"{totals['sugar']:.1f}g")
-            with col2:
-                st.metric("Sodium", f"{totals['sodium']:.0f}mg")
-                st.metric("Calcium", f"{totals['calcium']:.0f}mg")
-            with col3:
-                st.metric("Iron", f"{totals['iron']:.1f}mg")
-                st.metric("Vitamin C", f"{totals['vitamin_c']:.1f}mg")
+            # One table instead of six separate metric elements
+            more_nutrients = pd.DataFrame({
+                'Nutrient': ['Fiber', 'Sugar', 'Sodium', 'Calcium', 'Iron', 'Vitamin C'],
+                'Amount': [
+                    f"{totals['fiber']:.1f}g",
+                    f"{totals['sugar']:.1f}g",
+                    f"{totals['sodium']:.0f}mg",
+                    f"{totals['calcium']:.0f}mg",
+                    f"{totals['iron']:.1f}mg",
+                    f"{totals['vitamin_c']:.1f}mg"
+                ]
+            })
+            st.dataframe(more_nutrients, hide_index=True, use_container_width=True)
 
     def render_nutrition_analysis(self):
         """Render nutrition analysis and recommendations"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             return
         
         st.subheader("🎯 Nutrition Analysis & Recommendations")
         
-        # Calculate totals and analyze
-        totals = self.nutrition_analyzer.calculate_totals(st.session_state.daily_log)
+        # Analyze the running totals
+        totals = st.session_state.totals
         analysis = self.nutrition_analyzer.analyze_nutrition(totals)
         
         # Display deficiencies
         if analysis['deficiencies']:
             st.markdown("### ⚠️ Nutrient Gaps")
             for nutrient, info in analysis['deficiencies'].items():
-                st.markdown(f"""
-                <div class="warning-box">
-                    <strong>{nutrient.title()}</strong>: {info['current']:.1f}{info['unit']} / {info['target']:.1f}{info['unit']} 
-                    ({info['percentage']:.0f}% of target)
-                </div>
-                """, unsafe_allow_html=True)
+                st.warning(
+                    f"**{nutrient.title()}**: {info['current']:.1f}{info['unit']} / {info['target']:.1f}{info['unit']} "
+                    f"({info['percentage']:.0f}% of target)"
+                )
         
         # Display excesses
         if analysis['excesses']:
             st.markdown("### 🔴 Nutrient Excesses")
             for nutrient, info in analysis['excesses'].items():
-                st.markdown(f"""
-                <div style="background: #f8d7da; border: 1px solid #f5c6cb; padding: 1rem; border-radius: 8px; margin: 1rem 0; color: #721c24;">
-                    <strong>{nutrient.title()}</strong>: {info['current']:.1f}{info['unit']} / {info['target']:.1f}{info['unit']} 
-                    ({info['percentage']:.0f}% of target)
-                </div>
-                """, unsafe_allow_html=True)
+                st.error(
+                    f"**{nutrient.title()}**: {info['current']:.1f}{info['unit']} / {info['target']:.1f}{info['unit']} "
+                    f"({info['percentage']:.0f}% of target)"
+                )
         
         # Food recommendations
         if analysis['deficiencies']:
-            recommendations = self.food_recommender.get_recommendations(
-                analysis['deficiencies'], 
-                st.session_state.food_data
-            )
+            recommendations = cached_recommendations(tuple(analysis['deficiencies']))
             
             if recommendations:
                 st.markdown("### 💡 Recommended Foods")
@@ -316,14 +445,14 @@ class DietTrackerApp:
 
     def render_ai_suggestions(self):
         """Render AI-powered food pairing suggestions"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             return
             
         st.subheader("🤖 AI Nutrition Coach")
         
         try:
             # Get current nutrition status
-            totals = self.nutrition_analyzer.calculate_totals(st.session_state.daily_log)
+            totals = st.session_state.totals
             
             # Generate AI suggestions
             suggestions = self.food_recommender.get_ai_suggestions(
@@ -334,27 +463,36 @@ class DietTrackerApp:
             if suggestions:
                 st.markdown("### 🍽️ Smart Food Pairing Suggestions")
                 for suggestion in suggestions:
-                    st.markdown(f"""
-                    <div class="success-box">
-                        <strong>{suggestion['title']}</strong><br>
-                        {suggestion['description']}
-                        <br><small><strong>Why:</strong> {suggestion['reason']}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.success(
+                        f"**{suggestion['title']}**  \n"
+                        f"{suggestion['description']}  \n"
+                        f"**Why:** {suggestion['reason']}"
+                    )
             
         except Exception as e:
             st.error(f"Error generating AI suggestions: {str(e)}")
 
     def render_dashboard(self):
         """Render nutrition dashboard with charts"""
-        if not st.session_state.daily_log:
+        log = st.session_state.daily_log
+        if log.empty:
             st.info("Add foods to your daily log to see dashboard visualizations")
             return
             
         st.subheader("📈 Nutrition Dashboard")
         
-        # Calculate totals for charts
-        totals = self.nutrition_analyzer.calculate_totals(st.session_state.daily_log)
+        # Running totals for charts
+        totals = st.session_state.totals
+        
+        # Per-serving nutrient values of each logged food, named like the
+        # food database columns the charts expect
+        chart_columns = {
+            field: column for field, column in NUTRIENT_KEYS
+            if field in ('calories', 'protein', 'carbs', 'fat', 'fiber', 'sodium')
+        }
+        per_serving = log[list(chart_columns)].div(log['serving_size'], axis=0)
+        per_serving = per_serving.rename(columns=chart_columns)
+        per_serving.insert(0, 'Main food description', log['name'])
         
         # Create two columns for charts
         col1, col2 = st.columns(2)
@@ -362,118 +500,41 @@ class DietTrackerApp:
         with col1:
             # Macronutrient pie chart using existing method
             st.plotly_chart(
-                self.dashboard.create_macronutrient_pie_chart(totals, "Daily Macronutrient Breakdown"),
+                self.dashboard.create_macronutrient_pie_chart({
+                    'Protein (g)': totals['protein'],
+                    'Carbohydrate (g)': totals['carbs'],
+                    'Total Fat (g)': totals['fat']
+                }, "Daily Macronutrient Breakdown"),
                 use_container_width=True
             )
             
-            # Top nutrients consumed today (create a simple food data structure from daily log)
-            daily_foods = []
-            for entry in st.session_state.daily_log:
-                food_item = {
-                    'Main food description': entry['name'],
-                    'Energy (kcal)': entry['calories'] / entry['serving_size'],  # Per unit
-                    'Protein (g)': entry['protein'] / entry['serving_size'],
-                    'Total Fat (g)': entry['fat'] / entry['serving_size'],
-                    'Carbohydrate (g)': entry['carbs'] / entry['serving_size']
-                }
-                daily_foods.append(food_item)
-            
-            if daily_foods:
-                st.plotly_chart(
-                    self.dashboard.create_nutrient_comparison_bar(
-                        daily_foods, 
-                        ['Energy (kcal)', 'Protein (g)', 'Total Fat (g)', 'Carbohydrate (g)'],
-                        "Today's Foods - Nutrient Comparison"
-                    ),
-                    use_container_width=True
-                )
+            # Top nutrients consumed today, per serving of each logged food
+            st.plotly_chart(
+                self.dashboard.create_nutrient_comparison_bar(
+                    per_serving, 
+                    ['Energy (kcal)', 'Protein (g)', 'Total Fat (g)', 'Carbohydrate (g)'],
+                    "Today's Foods - Nutrient Comparison"
+                ),
+                use_container_width=True
+            )
         
         with col2:
             # Create a meal planning chart showing current vs targets
-            selected_foods = []
-            for entry in st.session_state.daily_log:
-                food_with_portion = {
-                    'Main food description': entry['name'],
-                    'Energy (kcal)': entry['calories'] / entry['serving_size'],
-                    'Protein (g)': entry['protein'] / entry['serving_size'],
-                    'Carbohydrate (g)': entry['carbs'] / entry['serving_size'],
-                    'Total Fat (g)': entry['fat'] / entry['serving_size'],
-                    'Fiber, total dietary (g)': entry['fiber'] / entry['serving_size'],
-                    'Sodium (mg)': entry['sodium'] / entry['serving_size'],
-                    'portion': entry['serving_size'] * 100  # Convert to grams
-                }
-                selected_foods.append(food_with_portion)
-            
-            # Get daily targets from session state or use defaults
-            daily_targets = {
-                'Energy (kcal)': getattr(st.session_state, 'calories_goal', 2000),
-                'Protein (g)': getattr(st.session_state, 'protein_goal', 150),
-                'Carbohydrate (g)': 250,
-                'Total Fat (g)': 65,
-                'Fiber, total dietary (g)': 25,
-                'Sodium (mg)': 2300
-            }
+            selected_foods = per_serving.assign(portion=log['serving_size'] * 100)  # Convert to grams
             
             st.plotly_chart(
                 self.dashboard.create_meal_planning_chart(
                     selected_foods, 
-                    daily_targets,
+                    st.session_state.daily_targets,
                     "Daily Progress vs Goals"
                 ),
                 use_container_width=True
             )
             
             # Timeline of calorie intake throughout the day
-            if len(st.session_state.daily_log) > 1:
-                # Create a simple timeline chart
-                timeline_data = []
-                cumulative_calories = 0
-                for entry in st.session_state.daily_log:
-                    cumulative_calories += entry['calories']
-                    timeline_data.append({
-                        'time': entry['timestamp'].strftime('%H:%M'),
-                        'calories': entry['calories'],
-                        'cumulative': cumulative_calories,
-                        'food': entry['name'][:20] + '...' if len(entry['name']) > 20 else entry['name']
-                    })
-                
-                # Create a simple line chart for timeline
-                import plotly.graph_objects as go
-                
-                fig = go.Figure()
-                
-                # Add cumulative calories line
-                fig.add_trace(go.Scatter(
-                    x=[d['time'] for d in timeline_data],
-                    y=[d['cumulative'] for d in timeline_data],
-                    mode='lines+markers',
-                    name='Cumulative Calories',
-                    line=dict(color='#1f77b4', width=3),
-                    marker=dict(size=8),
-                    hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Total: %{y:.0f} cal<extra></extra>',
-                    text=[d['food'] for d in timeline_data]
-                ))
-                
-                # Add individual meal bars
-                fig.add_trace(go.Bar(
-                    x=[d['time'] for d in timeline_data],
-                    y=[d['calories'] for d in timeline_data],
-                    name='Meal Calories',
-                    marker_color='rgba(255, 127, 14, 0.6)',
-                    hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Calories: %{y:.0f}<extra></extra>',
-                    text=[d['food'] for d in timeline_data]
-                ))
-                
-                fig.update_layout(
-                    title=dict(text="Calorie Intake Timeline", x=0.5, font=dict(size=16)),
-                    xaxis_title="Time",
-                    yaxis_title="Calories",
-                    height=400,
-                    margin=dict(t=50, b=50, l=50, r=50),
-                    showlegend=True
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            if len(log) > 1:
+                # The figure is kept up to date as foods are added or removed
+                st.plotly_chart(st.session_state.timeline_fig, use_container_width=True, key="timeline")
         
         # Additional dashboard section with expandable charts
         with st.expander("📊 Additional Analytics", expanded=False):
@@ -486,23 +547,14 @@ class DietTrackerApp:
                                     'Total Fat (g)', 'Fiber, total dietary (g)', 'Sodium (mg)']
                     
                     st.plotly_chart(
-                        self.dashboard.create_correlation_heatmap(
-                            st.session_state.food_data, 
-                            current_nutrients,
-                            "Nutrient Correlations in Database"
-                        ),
+                        heatmap_fig(tuple(current_nutrients), "Nutrient Correlations in Database"),
                         use_container_width=True
                     )
                 
                 with col4:
                     # Show top protein foods from database for reference
                     st.plotly_chart(
-                        self.dashboard.create_top_foods_chart(
-                            st.session_state.food_data,
-                            'Protein (g)',
-                            8,
-                            "Top Protein Foods (Database)"
-                        ),
+                        top_foods_fig('Protein (g)', 8, "Top Protein Foods (Database)"),
                         use_container_width=True
                     )
             
@@ -513,12 +565,12 @@ class DietTrackerApp:
             with summary_col1:
                 st.metric(
                     "Total Foods", 
-                    len(st.session_state.daily_log),
+                    len(log),
                     help="Number of food items logged today"
                 )
             
             with summary_col2:
-                avg_cal_per_food = totals['calories'] / len(st.session_state.daily_log) if st.session_state.daily_log else 0
+                avg_cal_per_food = totals['calories'] / len(log)
                 st.metric(
                     "Avg Cal/Food", 
                     f"{avg_cal_per_food:.0f}",
@@ -534,11 +586,10 @@ class DietTrackerApp:
                 )
             
             with summary_col4:
-                first_meal = min(st.session_state.daily_log, key=lambda x: x['timestamp']) if st.session_state.daily_log else None
-                last_meal = max(st.session_state.daily_log, key=lambda x: x['timestamp']) if st.session_state.daily_log else None
-                
-                if first_meal and last_meal and len(st.session_state.daily_log) > 1:
-                    eating_window = last_meal['timestamp'] - first_meal['timestamp']
+                if len(log) > 1:
+                    # Foods are appended as they are eaten, so the log is already in time order
+                    timestamps = log['timestamp']
+                    eating_window = timestamps.iat[-1] - timestamps.iat[0]
                     hours = eating_window.total_seconds() / 3600
                     st.metric(
                         "Eating Window", 
@@ -555,23 +606,24 @@ class DietTrackerApp:
             
             # Clear log button
             if st.button("🗑️ Clear All Foods", type="secondary"):
-                if st.session_state.daily_log:
-                    st.session_state.daily_log = []
+                if not st.session_state.daily_log.empty:
+                    st.session_state.daily_log = _empty_log()
+                    st.session_state.totals = _empty_totals()
+                    st.session_state.timeline_fig = _timeline_figure(st.session_state.daily_log)
                     st.success("Food log cleared!")
                     st.rerun()
             
             # Export data
-            if st.session_state.daily_log:
-                if st.button("📊 Export Data"):
-                    # Create downloadable CSV
-                    df = pd.DataFrame(st.session_state.daily_log)
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="Download CSV",
-                        data=csv,
-                        file_name=f"nutrition_log_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
+            if not st.session_state.daily_log.empty:
+                # The CSV is only generated when the download is clicked
+                st.download_button(
+                    label="📊 Export Data",
+                    data=partial(st.session_state.daily_log.to_csv, index=False,
+                                 float_format=CSV_FLOAT_FORMAT),
+                    file_name=f"nutrition_log_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    on_click="ignore"  # Downloading doesn't change anything to rerun for
+                )
             
             # Daily goals settings
             st.header("🎯 Daily Goals")
@@ -579,8 +631,8 @@ class DietTrackerApp:
             protein_goal = st.slider("Protein Goal (g)", 50, 200, 150)
             
             # Store goals in session state
-            st.session_state.calories_goal = calories_goal
-            st.session_state.protein_goal = protein_goal
+            st.session_state.daily_targets['Energy (kcal)'] = calories_goal
+            st.session_state.daily_targets['Protein (g)'] = protein_goal
 
     def run(self):
         """Main application runner"""
@@ -3,17 +3,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple
 import os
-import time
-import random
+import re
+from functools import partial
 
 # Import custom modules
-from data_processor import DataProcessor
-from nutrition_analyzer import NutritionAnalyzer
-from food_recommender import FoodRecommender
-from dashboard_charts import DashboardCharts
+from app_cache import (
+    load_food_db, cached_search, cached_recommendations,
+    heatmap_fig, top_foods_fig, get_helpers
+)
 
 # Page configuration with enhanced settings
 st.set_page_config(
@@ -28,389 +27,195 @@ st.set_page_config(
     }
 )
 
-# Enhanced CSS with modern design principles
-st.markdown("""
-<style>
-    /* Import modern fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Root variables for consistent theming */
-    :root {
-        --primary-color: #10B981;
-        --primary-dark: #059669;
-        --secondary-color: #8B5CF6;
-        --accent-color: #F59E0B;
-        --success-color: #10B981;
-        --warning-color: #F59E0B;
-        --error-color: #EF4444;
-        --info-color: #3B82F6;
-        --background-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --card-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
-        --hover-shadow: 0 20px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
-        --border-radius: 12px;
-        --transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-    }
-    
-    /* Global styles */
-    .main {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-        min-height: 100vh;
-    }
-    
-    /* Enhanced header with dynamic elements */
-    .main-header {
-        background: linear-gradient(135deg, var(--primary-color) 0%, var(--primary-dark) 100%);
-        padding: 2rem 3rem;
-        border-radius: 0 0 24px 24px;
-        margin: -1rem -1rem 2rem -1rem;
-        color: white;
-        position: relative;
-        overflow: hidden;
-        box-shadow: var(--card-shadow);
-    }
-    
-    .main-header::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        right: -50%;
-        width: 100%;
-        height: 200%;
-        background: linear-gradient(45deg, transparent, rgba(255,255,255,0.1), transparent);
-        transform: rotate(45deg);
-        animation: shimmer 3s infinite;
-    }
-    
-    @keyframes shimmer {
-        0% { transform: translateX(-100%) rotate(45deg); }
-        100% { transform: translateX(100%) rotate(45deg); }
-    }
-    
-    .header-content {
-        position: relative;
-        z-index: 1;
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        flex-wrap: wrap;
-        gap: 1rem;
-    }
-    
-    .header-title {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin: 0;
-        text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .dynamic-emoji {
-        font-size: 3rem;
-        animation: bounce 2s infinite;
-        margin-right: 1rem;
-    }
-    
-    @keyframes bounce {
-        0%, 20%, 50%, 80%, 100% { transform: translateY(0); }
-        40% { transform: translateY(-10px); }
-        60% { transform: translateY(-5px); }
-    }
-    
-    .date-display {
-        background: rgba(255, 255, 255, 0.2);
-        backdrop-filter: blur(10px);
-        padding: 0.8rem 1.5rem;
-        border-radius: var(--border-radius);
-        border: 1px solid rgba(255, 255, 255, 0.3);
-        font-weight: 500;
-        text-align: center;
-    }
-    
-    /* Enhanced metric cards */
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: var(--border-radius);
-        box-shadow: var(--card-shadow);
-        border: 1px solid rgba(0, 0, 0, 0.05);
-        transition: var(--transition);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-4px);
-        box-shadow: var(--hover-shadow);
-    }
-    
-    .metric-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 4px;
-        background: var(--background-gradient);
-    }
-    
-    /* Enhanced food item cards */
-    .food-item {
-        background: white;
-        padding: 1.2rem;
-        border-radius: var(--border-radius);
-        margin: 0.8rem 0;
-        border-left: 4px solid var(--success-color);
-        box-shadow: var(--card-shadow);
-        transition: var(--transition);
-        position: relative;
-    }
-    
-    .food-item:hover {
-        transform: translateX(4px);
-        box-shadow: var(--hover-shadow);
-        border-left-color: var(--primary-dark);
-    }
-    
-    .food-item-header {
-        font-weight: 600;
-        font-size: 1.1rem;
-        color: #1f2937;
-        margin-bottom: 0.5rem;
-    }
-    
-    .food-item-details {
-        color: #6b7280;
-        font-size: 0.9rem;
-        font-weight: 400;
-    }
-    
-    /* Enhanced alert boxes */
-    .alert-box {
-        padding: 1.2rem;
-        border-radius: var(--border-radius);
-        margin: 1rem 0;
-        border: 1px solid;
-        position: relative;
-        transition: var(--transition);
-    }
-    
-    .alert-box:hover {
-        transform: translateY(-2px);
-        box-shadow: var(--card-shadow);
-    }
-    
-    .warning-box {
-        background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
-        border-color: #f59e0b;
-        color: #92400e;
-    }
-    
-    .success-box {
-        background: linear-gradient(135deg, #d1fae5 0%, #a7f3d0 100%);
-        border-color: var(--success-color);
-        color: #065f46;
-    }
-    
-    .error-box {
-        background: linear-gradient(135deg, #fee2e2 0%, #fecaca 100%);
-        border-color: var(--error-color);
-        color: #991b1b;
-    }
-    
-    .info-box {
-        background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%);
-        border-color: var(--info-color);
-        color: #1e40af;
-    }
-    
-    /* Enhanced buttons */
-    .stButton > button {
-        border-radius: var(--border-radius);
-        border: none;
-        font-weight: 500;
-        transition: var(--transition);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: var(--hover-shadow);
-    }
-    
-    /* Loading animations */
-    .loading-spinner {
-        display: inline-block;
-        width: 20px;
-        height: 20px;
-        border: 2px solid #f3f3f3;
-        border-top: 2px solid var(--primary-color);
-        border-radius: 50%;
-        animation: spin 1s linear infinite;
-        margin-right: 0.5rem;
-    }
-    
-    @keyframes spin {
-        0% { transform: rotate(0deg); }
-        100% { transform: rotate(360deg); }
-    }
-    
-    /* Enhanced sidebar */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
-        border-right: 1px solid #e5e7eb;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-        background: white;
-        border-radius: var(--border-radius);
-        padding: 0.5rem;
-        box-shadow: var(--card-shadow);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        font-weight: 500;
-        transition: var(--transition);
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: var(--background-gradient);
-        color: white;
-    }
-    
-    /* Progress indicators */
-    .progress-ring {
-        transform: rotate(-90deg);
-    }
-    
-    .progress-ring-circle {
-        transition: stroke-dashoffset 0.35s;
-        transform-origin: 50% 50%;
-    }
-    
-    /* Tooltip enhancements */
-    .tooltip {
-        position: relative;
-        display: inline-block;
-        cursor: help;
-    }
-    
-    .tooltip .tooltiptext {
-        visibility: hidden;
-        width: 200px;
-        background-color: #333;
-        color: #fff;
-        text-align: center;
-        border-radius: 6px;
-        padding: 8px;
-        position: absolute;
-        z-index: 1;
-        bottom: 125%;
-        left: 50%;
-        margin-left: -100px;
-        opacity: 0;
-        transition: opacity 0.3s;
-        font-size: 0.85rem;
-    }
-    
-    .tooltip:hover .tooltiptext {
-        visibility: visible;
-        opacity: 1;
-    }
-    
-    /* Micro-interactions */
-    .pulse {
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles.css")
+
+@st.cache_data(show_spinner=False)
+def _load_css(path: str = CSS_PATH) -> str:
+    """
+    Read and minify the app stylesheet once per process
     
-    /* Enhanced form controls */
-    .stNumberInput input {
-        border-radius: var(--border-radius);
-        border: 2px solid #e5e7eb;
-        transition: var(--transition);
-    }
+    Args:
+        path (str): Path to the CSS file
+        
+    Returns:
+        str: Stylesheet without comments and redundant whitespace
+    """
+    with open(path, encoding="utf-8") as f:
+        css = f.read()
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,>])\s*", r"\1", css).strip()
+
+# Enhanced CSS with modern design principles, kept in styles.css. Streamlit
+# drops elements that a rerun does not emit, so it is injected every run
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
+
+# Shortest query the food search runs for
+MIN_SEARCH_LENGTH = 3
+
+# Macro calories at or below this count as none. The running totals are
+# updated by adding and subtracting, so removals can leave float drift
+# like 1e-7 where the true total is zero
+MIN_MACRO_CALORIES = 1e-6
+
+# Nutrient values come from float32 columns, so exports keep about as many
+# significant digits as float32 holds instead of its rounding noise
+CSV_FLOAT_FORMAT = '%.6g'
+
+# Daily log field and the food database column it is scaled from
+NUTRIENT_KEYS = [
+    ('calories', 'Energy (kcal)'),
+    ('protein', 'Protein (g)'),
+    ('carbs', 'Carbohydrate (g)'),
+    ('fat', 'Total Fat (g)'),
+    ('fiber', 'Fiber, total dietary (g)'),
+    ('sugar', 'Sugars, total (g)'),
+    ('sodium', 'Sodium (mg)')
+]
+
+# Columns of the daily log frame, one row per logged food
+LOG_COLUMNS = ['name', 'serving_size'] + [field for field, _ in NUTRIENT_KEYS] + [
+    'timestamp', 'food_id', 'category'
+]
+
+def _empty_log() -> pd.DataFrame:
+    """Create an empty daily log with typed columns
+
+    Rows are only ever appended with the current time or dropped, never
+    reordered, so the log stays sorted by timestamp and the first and last
+    rows are the first and last meals.
+    """
+    log = pd.DataFrame(columns=LOG_COLUMNS)
+    return log.astype({
+        'name': object,
+        'serving_size': float,
+        **{field: float for field, _ in NUTRIENT_KEYS},
+        'timestamp': 'datetime64[us]',
+        'food_id': object,
+        'category': object
+    })
+
+def _empty_totals() -> Dict[str, float]:
+    """Create zeroed running totals for every tracked nutrient"""
+    return {field: 0.0 for field, _ in NUTRIENT_KEYS}
+
+# Default daily goals, keyed by food database column; the calorie and
+# protein goals are adjusted from the sidebar
+DEFAULT_DAILY_TARGETS = {
+    'Energy (kcal)': 2000,
+    'Protein (g)': 150,
+    'Carbohydrate (g)': 250,
+    'Total Fat (g)': 65,
+    'Fiber, total dietary (g)': 25,
+    'Sodium (mg)': 2300
+}
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _macro_pie_fig(protein_cals: float, carb_cals: float, fat_cals: float) -> go.Figure:
+    """
+    Build the summary macronutrient pie, once per calorie split
     
-    .stNumberInput input:focus {
-        border-color: var(--primary-color);
-        box-shadow: 0 0 0 3px rgba(16, 185, 129, 0.1);
-    }
+    Args:
+        protein_cals (float): Calories from protein
+        carb_cals (float): Calories from carbohydrates
+        fat_cals (float): Calories from fat
+        
+    Returns:
+        go.Figure: Plotly pie chart
+    """
+    fig = px.pie(
+        values=[protein_cals, carb_cals, fat_cals],
+        names=['Protein', 'Carbohydrates', 'Fat'],
+        color_discrete_sequence=['#8b5cf6', '#f59e0b', '#10b981'],
+        title="Calories by Macronutrient"
+    )
     
-    .stTextInput input {
-        border-radius: var(--border-radius);
-        border: 2px solid #e5e7eb;
-        transition: var(--transition);
-    }
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>%{value:.0f} calories<br>%{percent}<extra></extra>'
+    )
     
-    .stTextInput input:focus {
-        border-color: var(--primary-color);
-        box-shadow: 0 0 0 3px rgba(16, 185, 129, 0.1);
-    }
+    fig.update_layout(
+        showlegend=True,
+        height=400,
+        font=dict(size=12),
+        title_x=0.5
+    )
+    return fig
+
+def _timeline_fig(timeline: Dict[str, List]) -> go.Figure:
+    """
+    Build the calorie intake timeline
     
-    /* Save confirmation animation */
-    .save-confirmation {
-        position: fixed;
-        top: 20px;
-        right: 20px;
-        background: var(--success-color);
-        color: white;
-        padding: 1rem 1.5rem;
-        border-radius: var(--border-radius);
-        box-shadow: var(--hover-shadow);
-        animation: slideInRight 0.3s ease-out;
-        z-index: 1000;
-    }
+    Args:
+        timeline (Dict[str, List]): Parallel 'time', 'food', 'calories' and
+            'cumulative' lists, one item per logged food
+        
+    Returns:
+        go.Figure: Cumulative calorie line over per-food calorie bars
+    """
+    fig = go.Figure()
     
-    @keyframes slideInRight {
-        from { transform: translateX(100%); opacity: 0; }
-        to { transform: translateX(0); opacity: 1; }
-    }
+    # Add cumulative calories line
+    fig.add_trace(go.Scatter(
+        x=timeline['time'],
+        y=timeline['cumulative'],
+        mode='lines+markers',
+        name='Cumulative Calories',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=8),
+        hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Total: %{y:.0f} cal<extra></extra>',
+        text=timeline['food']
+    ))
     
-    /* Chart loading placeholder */
-    .chart-loading {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        height: 400px;
-        background: linear-gradient(90deg, #f0f0f0 25%, #e0e0e0 50%, #f0f0f0 75%);
-        background-size: 200% 100%;
-        animation: loading 1.5s infinite;
-        border-radius: var(--border-radius);
-    }
+    # Add individual meal bars
+    fig.add_trace(go.Bar(
+        x=timeline['time'],
+        y=timeline['calories'],
+        name='Meal Calories',
+        marker_color='rgba(255, 127, 14, 0.6)',
+        hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Calories: %{y:.0f}<extra></extra>',
+        text=timeline['food']
+    ))
     
-    @keyframes loading {
-        0% { background-position: 200% 0; }
-        100% { background-position: -200% 0; }
-    }
-</style>
-""", unsafe_allow_html=True)
+    fig.update_layout(
+        title=dict(text="Calorie Intake Timeline", x=0.5, font=dict(size=16)),
+        xaxis_title="Time",
+        yaxis_title="Calories",
+        height=400,
+        margin=dict(t=50, b=50, l=50, r=50),
+        showlegend=True
+    )
+    return fig
 
 class EnhancedDietTrackerApp:
     def __init__(self):
         """Initialize the Enhanced Diet Tracker Application"""
         self.init_session_state()
-        self.data_processor = DataProcessor()
-        self.nutrition_analyzer = NutritionAnalyzer()
-        self.food_recommender = FoodRecommender()
-        self.dashboard = DashboardCharts()
+        (
+            self.data_processor,
+            self.nutrition_analyzer,
+            self.food_recommender,
+            self.dashboard
+        ) = get_helpers()
         
     def init_session_state(self):
         """Initialize session state variables with enhanced tracking"""
         if 'daily_log' not in st.session_state:
-            st.session_state.daily_log = []
+            st.session_state.daily_log = _empty_log()
+        if 'totals' not in st.session_state:
+            # Running nutrient totals of daily_log, updated as foods are added or removed
+            st.session_state.totals = _empty_totals()
+        if 'log_version' not in st.session_state:
+            # Bumped on every change to daily_log so rendered views know to refresh
+            st.session_state.log_version = 0
         if 'food_data' not in st.session_state:
             st.session_state.food_data = None
         if 'search_results' not in st.session_state:
             st.session_state.search_results = []
+        if 'daily_targets' not in st.session_state:
+            st.session_state.daily_targets = dict(DEFAULT_DAILY_TARGETS)
         if 'last_save_time' not in st.session_state:
             st.session_state.last_save_time = None
         if 'show_save_confirmation' not in st.session_state:
@@ -418,13 +223,13 @@ class EnhancedDietTrackerApp:
         if 'daily_emoji' not in st.session_state:
             # Set a daily emoji that changes each day
             today = datetime.now().date()
-            random.seed(today.toordinal())  # Consistent emoji for the day
             emojis = ["🥗", "🍎", "🥕", "🥦", "🍊", "🍇", "🥑", "🌶️", "🍅", "🥬"]
-            st.session_state.daily_emoji = random.choice(emojis)
+            # Consistent emoji for the day without touching the global RNG
+            st.session_state.daily_emoji = emojis[today.toordinal() % len(emojis)]
 
-    def get_dynamic_greeting(self) -> str:
+    def get_dynamic_greeting(self, now: datetime) -> str:
         """Get time-based greeting"""
-        hour = datetime.now().hour
+        hour = now.hour
         if hour < 12:
             return "Good Morning! 🌅"
         elif hour < 17:
@@ -447,30 +252,28 @@ class EnhancedDietTrackerApp:
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Simulate realistic loading time
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)  # Simulate loading
-                    progress_bar.progress(i + 1)
-                
-                st.session_state.food_data = self.data_processor.load_food_database()
+                food_data, status = load_food_db()
+                st.session_state.food_data = food_data
                 loading_placeholder.empty()
-                progress_bar.empty()
                 
-                # Show success confirmation
+                # Show load problems, then the success confirmation
+                for message in status['errors']:
+                    st.error(f"❌ {message}")
+                for message in status['warnings']:
+                    st.warning(f"⚠️ {message}")
+                if status['sample']:
+                    st.info("📝 Using sample food database. Upload your USDA CSV file for full functionality.")
                 st.success("✅ Database loaded successfully!")
-                time.sleep(1)
                 
             return True
         except Exception as e:
             st.error(f"❌ Error loading food database: {str(e)}")
             return False
 
-    def render_enhanced_header(self):
+    def render_enhanced_header(self, now: datetime):
         """Render the enhanced application header"""
-        current_time = datetime.now()
-        formatted_date = current_time.strftime("%A, %B %d, %Y")
-        formatted_time = current_time.strftime("%I:%M %p")
+        formatted_date = now.strftime("%A, %B %d, %Y")
+        formatted_time = now.strftime("%I:%M %p")
         
         st.markdown(f"""
         <div class="main-header">
@@ -479,7 +282,7 @@ class EnhancedDietTrackerApp:
                     <span class="dynamic-emoji">{st.session_state.daily_emoji}</span>
                     <div>
                         <h1 class="header-title">Smart Diet Tracker</h1>
-                        <p style="margin: 0; opacity: 0.9; font-size: 1.1rem;">{self.get_dynamic_greeting()}</p>
+                        <p style="margin: 0; opacity: 0.9; font-size: 1.1rem;">{self.get_dynamic_greeting(now)}</p>
                     </div>
                 </div>
                 <div class="date-display">
@@ -491,20 +294,19 @@ class EnhancedDietTrackerApp:
         """, unsafe_allow_html=True)
 
     def show_save_confirmation(self, message: str = "Changes saved successfully!"):
-        """Show animated save confirmation"""
+        """Show save confirmation as a toast that hides itself"""
         if st.session_state.show_save_confirmation:
-            st.markdown(f"""
-            <div class="save-confirmation">
-                ✅ {message}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Auto-hide after 3 seconds
-            time.sleep(3)
+            # Hidden by the browser after 3 seconds; nothing waits on the script side
+            st.toast(message, icon="✅", duration=3)
             st.session_state.show_save_confirmation = False
 
+    @st.fragment
     def render_enhanced_food_search(self):
-        """Enhanced food search interface with better UX"""
+        """Enhanced food search interface with better UX
+
+        Runs as a fragment so typing a query or adjusting the serving only
+        reruns this panel. Adding a food triggers a full app rerun.
+        """
         st.markdown("### 🔍 Discover & Add Foods")
         st.markdown("*Search through our comprehensive nutrition database*")
         
@@ -516,13 +318,18 @@ class EnhancedDietTrackerApp:
             key="food_search"
         )
         
-        if search_query:
+        query = search_query.lower().strip()
+        if 0 < len(query) < MIN_SEARCH_LENGTH:
+            # Too short to narrow the database usefully, so don't search yet
+            st.markdown(f"""
+            <div class="info-box">
+                <strong>⌨️ Keep typing</strong> - Enter at least {MIN_SEARCH_LENGTH} characters to search
+            </div>
+            """, unsafe_allow_html=True)
+        elif query:
             # Show loading state
             with st.spinner("🔍 Searching nutrition database..."):
-                search_results = self.data_processor.search_foods(
-                    st.session_state.food_data, 
-                    search_query
-                )
+                search_results = cached_search(query)
             
             if search_results:
                 st.markdown(f"""
@@ -531,62 +338,69 @@ class EnhancedDietTrackerApp:
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Enhanced results display
-                for idx, food in enumerate(search_results[:10]):
-                    with st.container():
-                        col1, col2, col3, col4 = st.columns([4, 1.5, 1, 1])
-                        
-                        with col1:
-                            calories = food.get('Energy (kcal)', 0)
-                            protein = food.get('Protein (g)', 0)
-                            
-                            # Color-code based on nutritional value
-                            if calories > 300:
-                                cal_color = "#ef4444"  # High calorie
-                            elif calories > 150:
-                                cal_color = "#f59e0b"  # Medium calorie
-                            else:
-                                cal_color = "#10b981"  # Low calorie
-                            
-                            st.markdown(f"""
-                            <div class="food-item">
-                                <div class="food-item-header">{food['Main food description']}</div>
-                                <div class="food-item-details">
-                                    <span style="color: {cal_color}; font-weight: 600;">⚡ {calories} cal</span> • 
-                                    <span style="color: #8b5cf6; font-weight: 600;">💪 {protein}g protein</span> • 
-                                    <span style="color: #6b7280;">🍃 {food.get('Carbohydrate (g)', 0)}g carbs</span>
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with col2:
-                            serving_size = st.number_input(
-                                "Servings",
-                                min_value=0.1,
-                                max_value=10.0,
-                                value=1.0,
-                                step=0.1,
-                                key=f"serving_{idx}",
-                                help="Adjust portion size"
-                            )
-                        
-                        with col3:
-                            st.markdown("<br>", unsafe_allow_html=True)  # Spacing
-                            portion_info = st.selectbox(
-                                "Unit",
-                                ["serving", "cup", "oz", "grams"],
-                                key=f"unit_{idx}",
-                                help="Portion unit"
-                            )
-                        
-                        with col4:
-                            st.markdown("<br>", unsafe_allow_html=True)  # Spacing
-                            if st.button("➕ Add", key=f"add_{idx}", help="Add to daily log"):
-                                self.add_food_to_log(food, serving_size)
-                                st.session_state.show_save_confirmation = True
-                                st.success("✅ Added to your log!")
-                                time.sleep(1)
-                                st.rerun()
+                # Enhanced results display, all cards in a single element
+                top_results = search_results[:10]
+                cards = []
+                for idx, food in enumerate(top_results):
+                    calories = food.get('Energy (kcal)', 0)
+                    protein = food.get('Protein (g)', 0)
+                    
+                    # Color-code based on nutritional value
+                    if calories > 300:
+                        cal_color = "#ef4444"  # High calorie
+                    elif calories > 150:
+                        cal_color = "#f59e0b"  # Medium calorie
+                    else:
+                        cal_color = "#10b981"  # Low calorie
+                    
+                    cards.append(f"""
+                    <div class="food-item" id="food-{idx}">
+                        <div class="food-item-header">{idx + 1}. {food['Main food description']}</div>
+                        <div class="food-item-details">
+                            <span style="color: {cal_color}; font-weight: 600;">⚡ {calories:.0f} cal</span> • 
+                            <span style="color: #8b5cf6; font-weight: 600;">💪 {protein:.1f}g protein</span> • 
+                            <span style="color: #6b7280;">🍃 {food.get('Carbohydrate (g)', 0):.1f}g carbs</span>
+                        </div>
+                    </div>
+                    """)
+                st.markdown("".join(cards), unsafe_allow_html=True)
+                
+                # One set of inputs for whichever result is picked
+                col1, col2, col3, col4 = st.columns([4, 1.5, 1, 1], vertical_alignment="bottom")
+                
+                with col1:
+                    selected = st.selectbox(
+                        "Food",
+                        range(len(top_results)),
+                        format_func=lambda idx: f"{idx + 1}. {top_results[idx]['Main food description']}",
+                        key="selected_food",
+                        help="Pick a result to add"
+                    )
+                
+                with col2:
+                    serving_size = st.number_input(
+                        "Servings",
+                        min_value=0.1,
+                        max_value=10.0,
+                        value=1.0,
+                        step=0.1,
+                        key="serving_size",
+                        help="Adjust portion size"
+                    )
+                
+                with col3:
+                    portion_info = st.selectbox(
+                        "Unit",
+                        ["serving", "cup", "oz", "grams"],
+                        key="serving_unit",
+                        help="Portion unit"
+                    )
+                
+                with col4:
+                    if st.button("➕ Add", key="add_selected", help="Add to daily log"):
+                        self.add_food_to_log(top_results[selected], serving_size)
+                        st.session_state.show_save_confirmation = True
+                        st.rerun()
             else:
                 st.markdown("""
                 <div class="warning-box">
@@ -600,11 +414,66 @@ class EnhancedDietTrackerApp:
                 </div>
                 """, unsafe_allow_html=True)
 
+    def _build_log_html(self, now: datetime) -> str:
+        """
+        Build the HTML cards for every entry in the daily log
+        
+        Args:
+            now (datetime): Reference time for the "minutes ago" labels
+            
+        Returns:
+            str: Concatenated food-item cards
+        """
+        cards = []
+        for idx, entry in enumerate(st.session_state.daily_log.itertuples(index=False)):
+            # Calculate nutrition density indicators
+            protein_ratio = (entry.protein * 4) / entry.calories if entry.calories > 0 else 0
+            
+            # Protein quality indicator
+            if protein_ratio > 0.3:
+                protein_quality = "🟢 High"
+            elif protein_ratio > 0.15:
+                protein_quality = "🟡 Good"
+            else:
+                protein_quality = "🔴 Low"
+            
+            time_ago = now - entry.timestamp
+            if time_ago.seconds < 3600:
+                time_display = f"{time_ago.seconds // 60}m ago"
+            else:
+                time_display = entry.timestamp.strftime("%I:%M %p")
+            
+            cards.append(f"""
+            <div class="food-item">
+                <div class="food-item-header">
+                    {idx + 1}. {entry.name}
+                    <span style="float: right; font-size: 0.9rem; font-weight: 400; color: #6b7280;">🕐 {time_display}</span>
+                </div>
+                <div class="food-item-details">
+                    <strong>Portion:</strong> {entry.serving_size:.1f} serving(s) • 
+                    <strong style="color: #ef4444;">⚡ {entry.calories:.0f} cal</strong><br>
+                    <strong>Macros:</strong> 
+                    P: <span style="color: #8b5cf6; font-weight: 600;">{entry.protein:.1f}g</span> • 
+                    C: <span style="color: #f59e0b; font-weight: 600;">{entry.carbs:.1f}g</span> • 
+                    F: <span style="color: #10b981; font-weight: 600;">{entry.fat:.1f}g</span><br>
+                    <small>Protein Quality: {protein_quality} • Fiber: {entry.fiber:.1f}g</small>
+                </div>
+            </div>
+            """)
+        return "".join(cards)
+
+    @st.fragment
     def render_enhanced_daily_log(self):
-        """Enhanced daily log with better visual hierarchy"""
+        """Enhanced daily log with better visual hierarchy
+
+        Runs as a fragment so picking entries to remove only reruns the log.
+        Removing them triggers a full app rerun. The clock is read here, not
+        passed in, so fragment-only reruns don't reuse the time of the last
+        full run.
+        """
         st.markdown("### 📝 Today's Nutrition Log")
         
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             st.markdown("""
             <div class="info-box pulse">
                 <strong>🍽️ Your food journal is empty</strong><br>
@@ -615,7 +484,7 @@ class EnhancedDietTrackerApp:
         
         # Log summary header
         total_items = len(st.session_state.daily_log)
-        total_calories = sum(entry['calories'] for entry in st.session_state.daily_log)
+        total_calories = st.session_state.totals['calories']
         
         st.markdown(f"""
         <div class="success-box">
@@ -623,78 +492,55 @@ class EnhancedDietTrackerApp:
         </div>
         """, unsafe_allow_html=True)
         
-        # Enhanced log display
-        for idx, entry in enumerate(st.session_state.daily_log):
-            col1, col2, col3 = st.columns([5, 1.5, 0.8])
-            
-            with col1:
-                # Calculate nutrition density indicators
-                protein_ratio = (entry['protein'] * 4) / entry['calories'] if entry['calories'] > 0 else 0
-                
-                # Protein quality indicator
-                if protein_ratio > 0.3:
-                    protein_quality = "🟢 High"
-                elif protein_ratio > 0.15:
-                    protein_quality = "🟡 Good"
-                else:
-                    protein_quality = "🔴 Low"
-                
-                st.markdown(f"""
-                <div class="food-item">
-                    <div class="food-item-header">{entry['name']}</div>
-                    <div class="food-item-details">
-                        <strong>Portion:</strong> {entry['serving_size']:.1f} serving(s) • 
-                        <strong style="color: #ef4444;">⚡ {entry['calories']:.0f} cal</strong><br>
-                        <strong>Macros:</strong> 
-                        P: <span style="color: #8b5cf6; font-weight: 600;">{entry['protein']:.1f}g</span> • 
-                        C: <span style="color: #f59e0b; font-weight: 600;">{entry['carbs']:.1f}g</span> • 
-                        F: <span style="color: #10b981; font-weight: 600;">{entry['fat']:.1f}g</span><br>
-                        <small>Protein Quality: {protein_quality} • Fiber: {entry['fiber']:.1f}g</small>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                time_ago = datetime.now() - entry['timestamp']
-                if time_ago.seconds < 3600:
-                    time_display = f"{time_ago.seconds // 60}m ago"
-                else:
-                    time_display = entry['timestamp'].strftime("%I:%M %p")
-                
-                st.markdown(f"""
-                <div style="text-align: center; padding-top: 1rem;">
-                    <div style="font-size: 0.9rem; color: #6b7280;">🕐 {time_display}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown("<br>", unsafe_allow_html=True)
-                if st.button("🗑️", key=f"remove_{idx}", help="Remove from log"):
-                    st.session_state.daily_log.pop(idx)
-                    st.session_state.show_save_confirmation = True
-                    st.rerun()
+        # Enhanced log display, all cards in a single element. The HTML only
+        # changes when the log does or the "minutes ago" labels tick over
+        now = datetime.now()
+        html_key = (st.session_state.log_version, now.strftime('%Y%m%d%H%M'))
+        if st.session_state.get('log_html_key') != html_key:
+            st.session_state.log_html = self._build_log_html(now)
+            st.session_state.log_html_key = html_key
+        st.markdown(st.session_state.log_html, unsafe_allow_html=True)
+        
+        # Pick entries to remove by their number in the list above
+        names = st.session_state.daily_log['name'].tolist()
+        col1, col2 = st.columns([5, 1], vertical_alignment="bottom")
+        with col1:
+            to_remove = st.multiselect(
+                "Remove from log",
+                range(len(names)),
+                format_func=lambda idx: f"{idx + 1}. {names[idx]}",
+                key="log_remove_selection",
+                placeholder="Choose foods to remove"
+            )
+        with col2:
+            if st.button("🗑️ Remove", key="remove_selected", disabled=not to_remove, help="Remove from log"):
+                self.remove_foods_from_log(to_remove)
+                st.session_state.pop("log_remove_selection")
+                st.session_state.show_save_confirmation = True
+                st.rerun()
 
-    def render_enhanced_sidebar(self):
+    def render_enhanced_sidebar(self, now: datetime):
         """Enhanced sidebar with modern toggle controls"""
         with st.sidebar:
             st.markdown("### ⚙️ Smart Controls")
             
             # Enhanced goal setting with visual indicators
             st.markdown("#### 🎯 Daily Nutrition Goals")
+            targets = st.session_state.daily_targets
             
             # Calories goal with visual feedback
             calories_goal = st.slider(
                 "Daily Calories Target",
                 min_value=1200,
                 max_value=3500,
-                value=getattr(st.session_state, 'calories_goal', 2000),
+                value=targets['Energy (kcal)'],
                 step=50,
                 help="Adjust based on your activity level and goals"
             )
             
             # Show calories progress if there's data
-            if st.session_state.daily_log:
-                current_calories = sum(entry['calories'] for entry in st.session_state.daily_log)
+            if not st.session_state.daily_log.empty:
+                current_calories = st.session_state.totals['calories']
                 progress = min(current_calories / calories_goal, 1.0)
                 st.progress(progress)
                 st.caption(f"Progress: {current_calories:.0f} / {calories_goal} cal ({progress*100:.0f}%)")
@@ -704,21 +550,21 @@ class EnhancedDietTrackerApp:
                 "Daily Protein Target (g)",
                 min_value=50,
                 max_value=250,
-                value=getattr(st.session_state, 'protein_goal', 150),
+                value=targets['Protein (g)'],
                 step=5,
                 help="Higher for muscle building, moderate for maintenance"
             )
             
             # Show protein progress
-            if st.session_state.daily_log:
-                current_protein = sum(entry['protein'] for entry in st.session_state.daily_log)
+            if not st.session_state.daily_log.empty:
+                current_protein = st.session_state.totals['protein']
                 protein_progress = min(current_protein / protein_goal, 1.0)
                 st.progress(protein_progress)
                 st.caption(f"Progress: {current_protein:.0f} / {protein_goal}g ({protein_progress*100:.0f}%)")
             
             # Store goals
-            st.session_state.calories_goal = calories_goal
-            st.session_state.protein_goal = protein_goal
+            targets['Energy (kcal)'] = calories_goal
+            targets['Protein (g)'] = protein_goal
             
             st.divider()
             
@@ -729,77 +575,111 @@ class EnhancedDietTrackerApp:
             
             with col1:
                 if st.button("🗑️ Clear Log", help="Remove all foods from today's log", use_container_width=True):
-                    if st.session_state.daily_log:
-                        st.session_state.daily_log = []
-                        st.success("✅ Log cleared!")
+                    if not st.session_state.daily_log.empty:
+                        st.session_state.daily_log = _empty_log()
+                        st.session_state.totals = _empty_totals()
+                        st.session_state.log_version += 1
+                        st.session_state.show_save_confirmation = True
                         st.rerun()
             
             with col2:
-                if st.session_state.daily_log:
-                    df = pd.DataFrame(st.session_state.daily_log)
-                    csv = df.to_csv(index=False)
+                if not st.session_state.daily_log.empty:
+                    # The CSV is only generated when the download is clicked
                     st.download_button(
                         label="📊 Export",
-                        data=csv,
-                        file_name=f"nutrition_log_{datetime.now().strftime('%Y%m%d')}.csv",
+                        data=partial(st.session_state.daily_log.to_csv, index=False,
+                                     float_format=CSV_FLOAT_FORMAT),
+                        file_name=f"nutrition_log_{now.strftime('%Y%m%d')}.csv",
                         mime="text/csv",
                         help="Download your nutrition data",
+                        on_click="ignore",  # Downloading doesn't change anything to rerun for
                         use_container_width=True
                     )
             
-            # Enhanced settings section
-            st.markdown("#### 🎨 Display Settings")
-            
-            # Theme toggle (placeholder for future enhancement)
-            dark_mode = st.toggle("🌙 Dark Mode", help="Toggle dark theme (coming soon)")
+            self.render_display_settings()
+
+    @st.fragment
+    def render_display_settings(self):
+        """Sidebar display and analysis settings
+
+        Called from inside the sidebar by render_enhanced_sidebar. Nothing on
+        the main page reads these yet, so they run as a fragment and changing
+        one doesn't rerun the whole app. The goal sliders stay outside it
+        because every tab depends on them.
+        """
+        # Enhanced settings section
+        st.markdown("#### 🎨 Display Settings")
+        
+        # Theme toggle (placeholder for future enhancement)
+        dark_mode = st.toggle("🌙 Dark Mode", help="Toggle dark theme (coming soon)")
+        
+        # Notification settings
+        notifications = st.toggle("🔔 Smart Reminders", value=True, help="Get nutrition reminders")
+        
+        # Advanced settings in expander
+        with st.expander("🔬 Advanced Settings"):
+            st.markdown("**Nutrition Preferences**")
+            metric_system = st.radio("Units", ["Imperial", "Metric"])
+            decimal_places = st.select_slider("Precision", [0, 1, 2], value=1)
             
-            # Notification settings
-            notifications = st.toggle("🔔 Smart Reminders", value=True, help="Get nutrition reminders")
+            st.markdown("**Analysis Settings**")
+            analysis_sensitivity = st.slider("Analysis Sensitivity", 1, 5, 3, help="Higher values show more detailed insights")
+            show_micronutrients = st.checkbox("Show Micronutrients", value=False)
             
-            # Advanced settings in expander
-            with st.expander("🔬 Advanced Settings"):
-                st.markdown("**Nutrition Preferences**")
-                metric_system = st.radio("Units", ["Imperial", "Metric"])
-                decimal_places = st.select_slider("Precision", [0, 1, 2], value=1)
-                
-                st.markdown("**Analysis Settings**")
-                analysis_sensitivity = st.slider("Analysis Sensitivity", 1, 5, 3, help="Higher values show more detailed insights")
-                show_micronutrients = st.checkbox("Show Micronutrients", value=False)
-                
-                # Store advanced settings
-                st.session_state.metric_system = metric_system
-                st.session_state.decimal_places = decimal_places
-                st.session_state.analysis_sensitivity = analysis_sensitivity
-                st.session_state.show_micronutrients = show_micronutrients
+            # Store advanced settings
+            st.session_state.metric_system = metric_system
+            st.session_state.decimal_places = decimal_places
+            st.session_state.analysis_sensitivity = analysis_sensitivity
+            st.session_state.show_micronutrients = show_micronutrients
 
     def add_food_to_log(self, food: Dict, serving_size: float):
         """Add food to daily log with enhanced data structure"""
         try:
             # Calculate nutritional values based on serving size
-            entry = {
-                'name': food['Main food description'],
-                'serving_size': serving_size,
-                'calories': food.get('Energy (kcal)', 0) * serving_size,
-                'protein': food.get('Protein (g)', 0) * serving_size,
-                'carbs': food.get('Carbohydrate (g)', 0) * serving_size,
-                'fat': food.get('Total Fat (g)', 0) * serving_size,
-                'fiber': food.get('Fibre (g)', 0) * serving_size,
-                'sugar': food.get('Sugars (g)', 0) * serving_size,
-                'sodium': food.get('Sodium (mg)', 0) * serving_size,
-                'timestamp': datetime.now(),
-                'food_id': food.get('Food code', ''),
-                'category': food.get('Major food group', 'Other')
-            }
+            values = [food.get(column, 0) * serving_size for _, column in NUTRIENT_KEYS]
             
-            st.session_state.daily_log.append(entry)
-            st.session_state.last_save_time = datetime.now()
+            timestamp = datetime.now()
+            log = st.session_state.daily_log
+            log.loc[len(log)] = [
+                food['Main food description'],
+                serving_size,
+                *values,
+                timestamp,
+                food.get('Food code', ''),
+                food.get('Major food group', 'Other')
+            ]
+            st.session_state.last_save_time = timestamp
+            st.session_state.log_version += 1
+            
+            # Keep the running totals in step with the log
+            totals = st.session_state.totals
+            for (field, _), value in zip(NUTRIENT_KEYS, values):
+                totals[field] += value
             
         except Exception as e:
             st.error(f"Error adding food to log: {str(e)}")
 
-    def render_enhanced_nutrition_summary(self):
+    def remove_foods_from_log(self, positions: List[int]):
+        """Remove food items from the daily log and subtract them from the totals"""
+        log = st.session_state.daily_log
+        removed = log.iloc[positions]
+        
+        # Renumber rows so positions and labels stay equal
+        st.session_state.daily_log = log.drop(index=log.index[positions]).reset_index(drop=True)
+        st.session_state.log_version += 1
+        
+        if st.session_state.daily_log.empty:
+            # Start from exact zeros rather than accumulated rounding error
+            st.session_state.totals = _empty_totals()
+        else:
+            totals = st.session_state.totals
+            removed_sums = removed[[field for field, _ in NUTRIENT_KEYS]].sum()
+            for field, _ in NUTRIENT_KEYS:
+                totals[field] -= float(removed_sums[field])
+
+    def render_enhanced_nutrition_summary(self, totals: Dict[str, float], targets: Dict[str, float]):
         """Enhanced nutrition summary with better visualizations"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             st.markdown("""
             <div class="info-box">
                 <strong>📊 No data to analyze yet</strong><br>
@@ -808,17 +688,6 @@ class EnhancedDietTrackerApp:
             """, unsafe_allow_html=True)
             return
 
-        # Calculate totals
-        totals = {
-            'calories': sum(entry['calories'] for entry in st.session_state.daily_log),
-            'protein': sum(entry['protein'] for entry in st.session_state.daily_log),
-            'carbs': sum(entry['carbs'] for entry in st.session_state.daily_log),
-            'fat': sum(entry['fat'] for entry in st.session_state.daily_log),
-            'fiber': sum(entry['fiber'] for entry in st.session_state.daily_log),
-            'sugar': sum(entry['sugar'] for entry in st.session_state.daily_log),
-            'sodium': sum(entry['sodium'] for entry in st.session_state.daily_log)
-        }
-
         # Enhanced metrics display
         st.markdown("### 📊 Daily Nutrition Summary")
         
@@ -826,7 +695,7 @@ class EnhancedDietTrackerApp:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            calories_goal = getattr(st.session_state, 'calories_goal', 2000)
+            calories_goal = targets['Energy (kcal)']
             calories_progress = min(totals['calories'] / calories_goal, 1.0) * 100
             
             # Color coding based on goal achievement
@@ -849,7 +718,7 @@ class EnhancedDietTrackerApp:
             """, unsafe_allow_html=True)
         
         with col2:
-            protein_goal = getattr(st.session_state, 'protein_goal', 150)
+            protein_goal = targets['Protein (g)']
             protein_progress = min(totals['protein'] / protein_goal, 1.0) * 100
             protein_color = "#8b5cf6"
             
@@ -897,47 +766,25 @@ class EnhancedDietTrackerApp:
         carb_cals = totals['carbs'] * 4
         fat_cals = totals['fat'] * 9
         
-        if protein_cals + carb_cals + fat_cals > 0:
-            fig = px.pie(
-                values=[protein_cals, carb_cals, fat_cals],
-                names=['Protein', 'Carbohydrates', 'Fat'],
-                color_discrete_sequence=['#8b5cf6', '#f59e0b', '#10b981'],
-                title="Calories by Macronutrient"
-            )
-            
-            fig.update_traces(
-                textposition='inside',
-                textinfo='percent+label',
-                hovertemplate='<b>%{label}</b><br>%{value:.0f} calories<br>%{percent}<extra></extra>'
-            )
-            
-            fig.update_layout(
-                showlegend=True,
-                height=400,
-                font=dict(size=12),
-                title_x=0.5
+        if protein_cals + carb_cals + fat_cals > MIN_MACRO_CALORIES:
+            # Hover is enough for this small chart, so skip the mode bar
+            st.plotly_chart(
+                _macro_pie_fig(protein_cals, carb_cals, fat_cals),
+                use_container_width=True,
+                config={'displayModeBar': False}
             )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No macronutrients logged yet")
 
-    def render_enhanced_nutrition_analysis(self):
+    def render_enhanced_nutrition_analysis(self, totals: Dict[str, float], targets: Dict[str, float]):
         """Enhanced nutrition analysis with AI insights"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             return
 
         st.markdown("### 🔍 Smart Nutrition Analysis")
 
-        # Calculate analysis metrics
-        totals = {
-            'calories': sum(entry['calories'] for entry in st.session_state.daily_log),
-            'protein': sum(entry['protein'] for entry in st.session_state.daily_log),
-            'carbs': sum(entry['carbs'] for entry in st.session_state.daily_log),
-            'fat': sum(entry['fat'] for entry in st.session_state.daily_log),
-            'fiber': sum(entry['fiber'] for entry in st.session_state.daily_log)
-        }
-
-        calories_goal = getattr(st.session_state, 'calories_goal', 2000)
-        protein_goal = getattr(st.session_state, 'protein_goal', 150)
+        calories_goal = targets['Energy (kcal)']
+        protein_goal = targets['Protein (g)']
 
         # Generate insights
         insights = []
@@ -995,13 +842,12 @@ class EnhancedDietTrackerApp:
             """, unsafe_allow_html=True)
 
         # --- Food Recommendations Section ---
-        # Analyze nutrition for deficiencies
-        analysis = self.nutrition_analyzer.analyze_nutrition(totals)
+        # Analyze nutrition for deficiencies in the nutrients covered above
+        analysis = self.nutrition_analyzer.analyze_nutrition({
+            nutrient: totals[nutrient] for nutrient in ('calories', 'protein', 'carbs', 'fat', 'fiber')
+        })
         if analysis['deficiencies']:
-            recommendations = self.food_recommender.get_recommendations(
-                analysis['deficiencies'],
-                st.session_state.food_data
-            )
+            recommendations = cached_recommendations(tuple(analysis['deficiencies']))
             if recommendations:
                 st.markdown("### 💡 Recommended Foods")
                 for nutrient, foods in recommendations.items():
@@ -1021,25 +867,17 @@ class EnhancedDietTrackerApp:
                                     if full_food:
                                         self.add_food_to_log(full_food, 1.0)
                                         st.session_state.show_save_confirmation = True
-                                        st.success("✅ Added to your log!")
                                         st.rerun()
 
-    def render_enhanced_ai_suggestions(self):
+    def render_enhanced_ai_suggestions(self, totals: Dict[str, float], targets: Dict[str, float]):
         """Enhanced AI-powered food recommendations"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             return
 
         st.markdown("### 🤖 AI-Powered Recommendations")
 
-        # Analyze current intake
-        totals = {
-            'calories': sum(entry['calories'] for entry in st.session_state.daily_log),
-            'protein': sum(entry['protein'] for entry in st.session_state.daily_log),
-            'fiber': sum(entry['fiber'] for entry in st.session_state.daily_log)
-        }
-
-        calories_goal = getattr(st.session_state, 'calories_goal', 2000)
-        protein_goal = getattr(st.session_state, 'protein_goal', 150)
+        calories_goal = targets['Energy (kcal)']
+        protein_goal = targets['Protein (g)']
 
         # Generate recommendations
         recommendations = []
@@ -1082,135 +920,121 @@ class EnhancedDietTrackerApp:
             </div>
             """, unsafe_allow_html=True)
 
-    def render_enhanced_dashboard(self):
+    def _build_dashboard_data(self, log_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, List]]:
+        """
+        Build every dashboard chart input from the daily log in one go
+        
+        Args:
+            log_df (pd.DataFrame): Daily log
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, Dict[str, List]]: Per-serving
+                nutrients named like the food database columns, the same
+                with a portion column in grams, and the timeline series
+        """
+        chart_columns = {
+            'calories': 'Energy (kcal)',
+            'protein': 'Protein (g)',
+            'carbs': 'Carbohydrate (g)',
+            'fat': 'Total Fat (g)',
+            'fiber': 'Fiber, total dietary (g)',
+            'sodium': 'Sodium (mg)'
+        }
+        servings = log_df['serving_size']
+        per_serving = log_df[list(chart_columns)].div(servings, axis=0).rename(columns=chart_columns)
+        per_serving.insert(0, 'Main food description', log_df['name'])
+        
+        selected_foods = per_serving.assign(portion=servings * 100)  # Convert to grams
+        
+        # Timeline series as parallel plain lists, passed to the traces as is
+        names = log_df['name']
+        timeline = {
+            'time': log_df['timestamp'].dt.strftime('%H:%M').tolist(),
+            'food': names.where(names.str.len() <= 20, names.str[:20] + '...').tolist(),
+            'calories': log_df['calories'].tolist(),
+            'cumulative': log_df['calories'].cumsum().tolist()
+        }
+        
+        return per_serving, selected_foods, timeline
+
+    def _build_dashboard_figures(self, log_df: pd.DataFrame, totals: Dict[str, float],
+                                 targets: Dict[str, float]) -> Dict[str, go.Figure]:
+        """
+        Build the dashboard's log-dependent figures
+        
+        Args:
+            log_df (pd.DataFrame): Daily log
+            totals (Dict[str, float]): Running totals of the log
+            targets (Dict[str, float]): Daily nutrition goals
+            
+        Returns:
+            Dict[str, go.Figure]: Figures by chart name. The macro pie is left
+                out while nothing logged has macros, and the timeline until at
+                least two foods are logged
+        """
+        per_serving, selected_foods, timeline = self._build_dashboard_data(log_df)
+        
+        figures = {
+            'comparison': self.dashboard.create_nutrient_comparison_bar(
+                per_serving,
+                ['Energy (kcal)', 'Protein (g)', 'Total Fat (g)', 'Carbohydrate (g)'],
+                "Today's Foods - Nutrient Comparison"
+            ),
+            'meal_planning': self.dashboard.create_meal_planning_chart(
+                selected_foods,
+                targets,
+                "Daily Progress vs Goals"
+            )
+        }
+        if totals['protein'] * 4 + totals['carbs'] * 4 + totals['fat'] * 9 > MIN_MACRO_CALORIES:
+            # The chart reads food database column names
+            figures['macros'] = self.dashboard.create_macronutrient_pie_chart({
+                'Protein (g)': totals['protein'],
+                'Carbohydrate (g)': totals['carbs'],
+                'Total Fat (g)': totals['fat']
+            }, "Daily Macronutrient Breakdown")
+        if len(log_df) > 1:
+            figures['timeline'] = _timeline_fig(timeline)
+        return figures
+
+    def render_enhanced_dashboard(self, totals: Dict[str, float], targets: Dict[str, float]):
         """Render nutrition dashboard with charts"""
-        if not st.session_state.daily_log:
+        if st.session_state.daily_log.empty:
             st.info("Add foods to your daily log to see dashboard visualizations")
             return
             
         st.subheader("📈 Nutrition Dashboard")
         
-        # Calculate totals for charts
-        totals = self.nutrition_analyzer.calculate_totals(st.session_state.daily_log)
+        # The figures only depend on the log and the goals, so they are
+        # rebuilt when either changes rather than on every rerun
+        figures_key = (st.session_state.log_version, tuple(targets.items()))
+        if st.session_state.get('dashboard_figures_key') != figures_key:
+            st.session_state.dashboard_figures = self._build_dashboard_figures(
+                st.session_state.daily_log, totals, targets
+            )
+            st.session_state.dashboard_figures_key = figures_key
+        figures = st.session_state.dashboard_figures
         
         # Create two columns for charts
         col1, col2 = st.columns(2)
         
         with col1:
             # Macronutrient pie chart using existing method
-            st.plotly_chart(
-                self.dashboard.create_macronutrient_pie_chart(totals, "Daily Macronutrient Breakdown"),
-                use_container_width=True
-            )
-            
-            # Top nutrients consumed today (create a simple food data structure from daily log)
-            daily_foods = []
-            for entry in st.session_state.daily_log:
-                food_item = {
-                    'Main food description': entry['name'],
-                    'Energy (kcal)': entry['calories'] / entry['serving_size'],  # Per unit
-                    'Protein (g)': entry['protein'] / entry['serving_size'],
-                    'Total Fat (g)': entry['fat'] / entry['serving_size'],
-                    'Carbohydrate (g)': entry['carbs'] / entry['serving_size']
-                }
-                daily_foods.append(food_item)
+            if 'macros' in figures:
+                st.plotly_chart(figures['macros'], use_container_width=True)
+            else:
+                st.info("No macronutrients logged yet")
             
-            if daily_foods:
-                st.plotly_chart(
-                    self.dashboard.create_nutrient_comparison_bar(
-                        daily_foods, 
-                        ['Energy (kcal)', 'Protein (g)', 'Total Fat (g)', 'Carbohydrate (g)'],
-                        "Today's Foods - Nutrient Comparison"
-                    ),
-                    use_container_width=True
-                )
+            # Top nutrients consumed today, per serving of each logged food
+            st.plotly_chart(figures['comparison'], use_container_width=True)
         
         with col2:
-            # Create a meal planning chart showing current vs targets
-            selected_foods = []
-            for entry in st.session_state.daily_log:
-                food_with_portion = {
-                    'Main food description': entry['name'],
-                    'Energy (kcal)': entry['calories'] / entry['serving_size'],
-                    'Protein (g)': entry['protein'] / entry['serving_size'],
-                    'Carbohydrate (g)': entry['carbs'] / entry['serving_size'],
-                    'Total Fat (g)': entry['fat'] / entry['serving_size'],
-                    'Fiber, total dietary (g)': entry['fiber'] / entry['serving_size'],
-                    'Sodium (mg)': entry['sodium'] / entry['serving_size'],
-                    'portion': entry['serving_size'] * 100  # Convert to grams
-                }
-                selected_foods.append(food_with_portion)
-            
-            # Get daily targets from session state or use defaults
-            daily_targets = {
-                'Energy (kcal)': getattr(st.session_state, 'calories_goal', 2000),
-                'Protein (g)': getattr(st.session_state, 'protein_goal', 150),
-                'Carbohydrate (g)': 250,
-                'Total Fat (g)': 65,
-                'Fiber, total dietary (g)': 25,
-                'Sodium (mg)': 2300
-            }
-            
-            st.plotly_chart(
-                self.dashboard.create_meal_planning_chart(
-                    selected_foods, 
-                    daily_targets,
-                    "Daily Progress vs Goals"
-                ),
-                use_container_width=True
-            )
+            # Meal planning chart showing current vs targets
+            st.plotly_chart(figures['meal_planning'], use_container_width=True)
             
             # Timeline of calorie intake throughout the day
-            if len(st.session_state.daily_log) > 1:
-                # Create a simple timeline chart
-                timeline_data = []
-                cumulative_calories = 0
-                for entry in st.session_state.daily_log:
-                    cumulative_calories += entry['calories']
-                    timeline_data.append({
-                        'time': entry['timestamp'].strftime('%H:%M'),
-                        'calories': entry['calories'],
-                        'cumulative': cumulative_calories,
-                        'food': entry['name'][:20] + '...' if len(entry['name']) > 20 else entry['name']
-                    })
-                
-                # Create a simple line chart for timeline
-                import plotly.graph_objects as go
-                
-                fig = go.Figure()
-                
-                # Add cumulative calories line
-                fig.add_trace(go.Scatter(
-                    x=[d['time'] for d in timeline_data],
-                    y=[d['cumulative'] for d in timeline_data],
-                    mode='lines+markers',
-                    name='Cumulative Calories',
-                    line=dict(color='#1f77b4', width=3),
-                    marker=dict(size=8),
-                    hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Total: %{y:.0f} cal<extra></extra>',
-                    text=[d['food'] for d in timeline_data]
-                ))
-                
-                # Add individual meal bars
-                fig.add_trace(go.Bar(
-                    x=[d['time'] for d in timeline_data],
-                    y=[d['calories'] for d in timeline_data],
-                    name='Meal Calories',
-                    marker_color='rgba(255, 127, 14, 0.6)',
-                    hovertemplate='<b>%{text}</b><br>Time: %{x}<br>Calories: %{y:.0f}<extra></extra>',
-                    text=[d['food'] for d in timeline_data]
-                ))
-                
-                fig.update_layout(
-                    title=dict(text="Calorie Intake Timeline", x=0.5, font=dict(size=16)),
-                    xaxis_title="Time",
-                    yaxis_title="Calories",
-                    height=400,
-                    margin=dict(t=50, b=50, l=50, r=50),
-                    showlegend=True
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            if 'timeline' in figures:
+                st.plotly_chart(figures['timeline'], use_container_width=True)
         
         # Additional dashboard section with expandable charts
         with st.expander("📊 Additional Analytics", expanded=False):
@@ -1223,23 +1047,14 @@ class EnhancedDietTrackerApp:
                                     'Total Fat (g)', 'Fiber, total dietary (g)', 'Sodium (mg)']
                     
                     st.plotly_chart(
-                        self.dashboard.create_correlation_heatmap(
-                            st.session_state.food_data, 
-                            current_nutrients,
-                            "Nutrient Correlations in Database"
-                        ),
+                        heatmap_fig(tuple(current_nutrients), "Nutrient Correlations in Database"),
                         use_container_width=True
                     )
                 
                 with col4:
                     # Show top protein foods from database for reference
                     st.plotly_chart(
-                        self.dashboard.create_top_foods_chart(
-                            st.session_state.food_data,
-                            'Protein (g)',
-                            8,
-                            "Top Protein Foods (Database)"
-                        ),
+                        top_foods_fig('Protein (g)', 8, "Top Protein Foods (Database)"),
                         use_container_width=True
                     )
             
@@ -1255,7 +1070,7 @@ class EnhancedDietTrackerApp:
                 )
             
             with summary_col2:
-                avg_cal_per_food = totals['calories'] / len(st.session_state.daily_log) if st.session_state.daily_log else 0
+                avg_cal_per_food = totals['calories'] / len(st.session_state.daily_log) if len(st.session_state.daily_log) else 0
                 st.metric(
                     "Avg Cal/Food", 
                     f"{avg_cal_per_food:.0f}",
@@ -1271,11 +1086,10 @@ class EnhancedDietTrackerApp:
                 )
             
             with summary_col4:
-                first_meal = min(st.session_state.daily_log, key=lambda x: x['timestamp']) if st.session_state.daily_log else None
-                last_meal = max(st.session_state.daily_log, key=lambda x: x['timestamp']) if st.session_state.daily_log else None
-                
-                if first_meal and last_meal and len(st.session_state.daily_log) > 1:
-                    eating_window = last_meal['timestamp'] - first_meal['timestamp']
+                # Foods are appended as they are eaten, so the log is already in time order
+                if len(st.session_state.daily_log) > 1:
+                    timestamps = st.session_state.daily_log['timestamp']
+                    eating_window = timestamps.iat[-1] - timestamps.iat[0]
                     hours = eating_window.total_seconds() / 3600
                     st.metric(
                         "Eating Window", 
@@ -1291,14 +1105,22 @@ class EnhancedDietTrackerApp:
         if not self.load_data():
             return
         
+        # One clock reading shared by the header and sidebar; the daily log
+        # fragment reads its own so fragment-only reruns stay current
+        now = datetime.now()
+        
         # Render enhanced components
-        self.render_enhanced_header()
-        self.render_enhanced_sidebar()
+        self.render_enhanced_header(now)
+        self.render_enhanced_sidebar(now)
         
         # Show save confirmation if needed
         if st.session_state.show_save_confirmation:
             self.show_save_confirmation()
         
+        # Running totals of the log and the goals set in the sidebar, shared by every tab
+        totals = st.session_state.totals
+        targets = st.session_state.daily_targets
+        
         # Enhanced main content tabs
         tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "🔍 Discover & Add", 
@@ -1315,14 +1137,14 @@ class EnhancedDietTrackerApp:
             self.render_enhanced_daily_log()
         
         with tab3:
-            self.render_enhanced_nutrition_summary()
+            self.render_enhanced_nutrition_summary(totals, targets)
         
         with tab4:
-            self.render_enhanced_nutrition_analysis()
-            self.render_enhanced_ai_suggestions()
+            self.render_enhanced_nutrition_analysis(totals, targets)
+            self.render_enhanced_ai_suggestions(totals, targets)
         
         with tab5:
-            self.render_enhanced_dashboard()
+            self.render_enhanced_dashboard(totals, targets)
 
 # Run the enhanced application
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 # food_recommender.py
 import streamlit as st
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 import random
 
 class FoodRecommender:
@@ -161,12 +161,14 @@ class FoodRecommender:
         else:
             return ''
     
-    def get_ai_suggestions(self, daily_log: List[Dict], totals: Dict[str, float]) -> List[Dict]:
+    def get_ai_suggestions(self, daily_log: Union[List[Dict], pd.DataFrame],
+                           totals: Dict[str, float]) -> List[Dict]:
         """
         Generate AI-powered food pairing and nutrition suggestions
         
         Args:
-            daily_log (List[Dict]): Current day's food log
+            daily_log (Union[List[Dict], pd.DataFrame]): Current day's food log,
+                as records or as one row per item
             totals (Dict[str, float]): Current nutritional totals
             
         Returns:
@@ -176,7 +178,10 @@ class FoodRecommender:
             suggestions = []
             
             # Analyze current foods for pairing opportunities
-            current_foods = [entry['name'].lower() for entry in daily_log]
+            if isinstance(daily_log, pd.DataFrame):
+                current_foods = daily_log['name'].str.lower().tolist()
+            else:
+                current_foods = [entry['name'].lower() for entry in daily_log]
             
             # Iron absorption enhancement
             if any('iron' in food or 'meat' in food or 'spinach' in food for food in current_foods):
@@ -232,17 +237,21 @@ class FoodRecommender:
             st.error(f"Error generating AI suggestions: {str(e)}")
             return []
     
-    def _get_meal_timing_suggestions(self, daily_log: List[Dict]) -> List[Dict]:
+    def _get_meal_timing_suggestions(self, daily_log: Union[List[Dict], pd.DataFrame]) -> List[Dict]:
         """Generate meal timing suggestions"""
         suggestions = []
         
         try:
-            if not daily_log:
+            if len(daily_log) == 0:
                 return suggestions
             
             # Check if protein is distributed throughout the day
-            morning_protein = sum(entry.get('protein', 0) for entry in daily_log 
-                                if 'timestamp' in entry and entry['timestamp'].hour < 12)
+            if isinstance(daily_log, pd.DataFrame):
+                morning = pd.to_datetime(daily_log['timestamp']).dt.hour < 12
+                morning_protein = daily_log.loc[morning, 'protein'].sum()
+            else:
+                morning_protein = sum(entry.get('protein', 0) for entry in daily_log 
+                                    if 'timestamp' in entry and entry['timestamp'].hour < 12)
             
             if morning_protein < 20:
                 suggestions.append({
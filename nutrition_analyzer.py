@@ -1,7 +1,42 @@
 # nutrition_analyzer.py
 import streamlit as st
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, Union
 import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+@lru_cache(maxsize=64)
+def _score_nutrients(current: Tuple[float, ...], targets: Tuple[float, ...],
+                     lower: Tuple[float, ...], upper: Tuple[float, ...]) -> Tuple[tuple, ...]:
+    """
+    Classify nutrient intakes against their acceptable ranges in one pass
+    
+    Cached on the inputs, so reruns with unchanged totals skip the work.
+    
+    Args:
+        current (Tuple[float, ...]): Current intake per nutrient
+        targets (Tuple[float, ...]): Non-zero daily target per nutrient
+        lower (Tuple[float, ...]): Lower bound of the acceptable range, as a fraction of target
+        upper (Tuple[float, ...]): Upper bound of the acceptable range, may be inf
+        
+    Returns:
+        Tuple[tuple, ...]: Percentages of target, deficiency flags, excess
+        flags and per-nutrient scores
+    """
+    current = np.asarray(current, dtype=float)
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    
+    percentages = current / np.asarray(targets, dtype=float) * 100
+    deficient = percentages < lower * 100
+    excess = ~deficient & (percentages > upper * 100)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        excess_scores = np.minimum(1.0, upper * 100 / percentages)
+    scores = np.where(deficient, percentages / 100, np.where(excess, excess_scores, 1.0))
+    
+    return (tuple(percentages.tolist()), tuple(deficient.tolist()),
+            tuple(excess.tolist()), tuple(scores.tolist()))
 
 class NutritionAnalyzer:
     """Analyzes nutritional data and provides recommendations"""
@@ -34,12 +69,13 @@ class NutritionAnalyzer:
             'vitamin_c': (0.8, float('inf')) # At least 80%
         }
     
-    def calculate_totals(self, daily_log: List[Dict]) -> Dict[str, float]:
+    def calculate_totals(self, daily_log: Union[List[Dict], pd.DataFrame]) -> Dict[str, float]:
         """
         Calculate total nutritional values from daily log
         
         Args:
-            daily_log (List[Dict]): List of logged food items
+            daily_log (Union[List[Dict], pd.DataFrame]): Logged food items, as
+                records or as one row per item
             
         Returns:
             Dict[str, float]: Total nutritional values
@@ -58,6 +94,12 @@ class NutritionAnalyzer:
                 'vitamin_c': 0.0
             }
             
+            if isinstance(daily_log, pd.DataFrame):
+                # Column sums over the log frame
+                present = [nutrient for nutrient in totals if nutrient in daily_log.columns]
+                totals.update(daily_log[present].sum().astype(float).to_dict())
+                return totals
+            
             for entry in daily_log:
                 for nutrient in totals.keys():
                     totals[nutrient] += entry.get(nutrient, 0.0)
@@ -90,42 +132,38 @@ class NutritionAnalyzer:
                 'overall_score': 0.0
             }
             
-            scores = []
-            
-            for nutrient, current_value in totals.items():
-                if nutrient not in targets:
-                    continue
-                
-                target_value = targets[nutrient]
-                if target_value == 0:
-                    continue
-                
-                percentage = (current_value / target_value) * 100
-                acceptable_range = self.acceptable_ranges.get(nutrient, (0.8, 1.2))
-                
-                min_acceptable = acceptable_range[0] * 100
-                max_acceptable = acceptable_range[1] * 100 if acceptable_range[1] != float('inf') else float('inf')
-                
+            nutrients = [
+                nutrient for nutrient in totals
+                if nutrient in targets and targets[nutrient] != 0
+            ]
+            if not nutrients:
+                return analysis
+            
+            ranges = [self.acceptable_ranges.get(nutrient, (0.8, 1.2)) for nutrient in nutrients]
+            percentages, deficient, excess, scores = _score_nutrients(
+                tuple(float(totals[nutrient]) for nutrient in nutrients),
+                tuple(float(targets[nutrient]) for nutrient in nutrients),
+                tuple(float(low) for low, _ in ranges),
+                tuple(float(high) for _, high in ranges)
+            )
+            
+            for i, nutrient in enumerate(nutrients):
                 nutrient_info = {
-                    'current': current_value,
-                    'target': target_value,
-                    'percentage': percentage,
+                    'current': totals[nutrient],
+                    'target': targets[nutrient],
+                    'percentage': percentages[i],
                     'unit': self._get_nutrient_unit(nutrient)
                 }
                 
-                if percentage < min_acceptable:
+                if deficient[i]:
                     analysis['deficiencies'][nutrient] = nutrient_info
-                    scores.append(percentage / 100)
-                elif max_acceptable != float('inf') and percentage > max_acceptable:
+                elif excess[i]:
                     analysis['excesses'][nutrient] = nutrient_info
-                    scores.append(min(1.0, max_acceptable / percentage))
                 else:
                     analysis['within_range'][nutrient] = nutrient_info
-                    scores.append(1.0)
             
             # Calculate overall nutrition score (0-100)
-            if scores:
-                analysis['overall_score'] = (sum(scores) / len(scores)) * 100
+            analysis['overall_score'] = (sum(scores) / len(scores)) * 100
             
             return analysis
             
@@ -329,47 +367,63 @@ class NutritionAnalyzer:
             else:
                 return "low"
     
-    def get_meal_timing_analysis(self, daily_log: List[Dict]) -> Dict[str, Any]:
+    def get_meal_timing_analysis(self, daily_log: Union[List[Dict], pd.DataFrame]) -> Dict[str, Any]:
         """
         Analyze meal timing and distribution
         
         Args:
-            daily_log (List[Dict]): List of logged food items with timestamps
+            daily_log (Union[List[Dict], pd.DataFrame]): Logged food items with
+                timestamps, as a list of dicts or a DataFrame with one row per item
             
         Returns:
             Dict[str, Any]: Meal timing analysis
         """
         try:
-            if not daily_log:
+            if len(daily_log) == 0:
                 return {}
             
-            # Group foods by time periods
-            meals = {
-                'breakfast': [],  # 5 AM - 11 AM
-                'lunch': [],      # 11 AM - 3 PM
-                'dinner': [],     # 5 PM - 9 PM
-                'snacks': []      # Other times
+            # Calories and item counts per time period, in one pass over the log
+            meal_calories = {
+                'breakfast': 0,  # 5 AM - 11 AM
+                'lunch': 0,      # 11 AM - 3 PM
+                'dinner': 0,     # 5 PM - 9 PM
+                'snacks': 0      # Other times
             }
-            
-            for entry in daily_log:
-                hour = entry.get('timestamp').hour if 'timestamp' in entry else 12
-                
-                if 5 <= hour < 11:
-                    meals['breakfast'].append(entry)
-                elif 11 <= hour < 15:
-                    meals['lunch'].append(entry)
-                elif 17 <= hour < 21:
-                    meals['dinner'].append(entry)
-                else:
-                    meals['snacks'].append(entry)
-            
-            # Calculate calories per meal
-            meal_calories = {}
-            for meal_name, items in meals.items():
-                meal_calories[meal_name] = sum(item.get('calories', 0) for item in items)
-            
-            total_calories = sum(meal_calories.values())
-            
+            meal_items = dict.fromkeys(meal_calories, 0)
+            total_calories = 0
+            
+            if isinstance(daily_log, pd.DataFrame):
+                # Bucket the whole timestamp column at once
+                hours = pd.to_datetime(daily_log['timestamp']).dt.hour.fillna(12)
+                calories = daily_log['calories'].astype(float)
+                periods = {
+                    'breakfast': (hours >= 5) & (hours < 11),
+                    'lunch': (hours >= 11) & (hours < 15),
+                    'dinner': (hours >= 17) & (hours < 21)
+                }
+                periods['snacks'] = ~(periods['breakfast'] | periods['lunch'] | periods['dinner'])
+                for meal_name, in_period in periods.items():
+                    meal_calories[meal_name] = float(calories[in_period].sum())
+                    meal_items[meal_name] = int(in_period.sum())
+                total_calories = float(calories.sum())
+            else:
+                for entry in daily_log:
+                    hour = entry.get('timestamp').hour if 'timestamp' in entry else 12
+                    
+                    if 5 <= hour < 11:
+                        meal_name = 'breakfast'
+                    elif 11 <= hour < 15:
+                        meal_name = 'lunch'
+                    elif 17 <= hour < 21:
+                        meal_name = 'dinner'
+                    else:
+                        meal_name = 'snacks'
+                    
+                    calories = entry.get('calories', 0)
+                    meal_calories[meal_name] += calories
+                    meal_items[meal_name] += 1
+                    total_calories += calories
+                    
             # Calculate meal distribution percentages
             meal_percentages = {}
             for meal_name, calories in meal_calories.items():
@@ -379,7 +433,7 @@ class NutritionAnalyzer:
                 'meal_calories': meal_calories,
                 'meal_percentages': meal_percentages,
                 'total_calories': total_calories,
-                'meal_count': len([m for m in meals.values() if m])
+                'meal_count': sum(1 for count in meal_items.values() if count)
             }
             
         except Exception as e: